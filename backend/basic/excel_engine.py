@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import json
 import math
 import re
@@ -47,7 +48,8 @@ def _cell_to_rc(cell: str) -> Tuple[int, int]:
 
 
 def _load_sheet_from_json(path: Path) -> Dict[str, SheetGrid]:
-    data = json.loads(path.read_text())
+    with path.open(encoding="utf-8") as f:
+        data = json.load(f)
     sheets: Dict[str, SheetGrid] = {}
     for name, payload in data.get("sheets", {}).items():
         sheets[name] = SheetGrid(
@@ -62,7 +64,8 @@ def _load_sheet_from_json(path: Path) -> Dict[str, SheetGrid]:
 def _load_fallback_dump() -> Dict[str, SheetGrid]:
     sheets: Dict[str, SheetGrid] = {}
     for path in FALLBACK_DIR.glob("*.json"):
-        raw = json.loads(path.read_text())
+        with path.open() as f:
+            raw = json.load(f)
         name = raw.get("sheet")
         if not name:
             continue
@@ -75,7 +78,13 @@ def _load_fallback_dump() -> Dict[str, SheetGrid]:
     return sheets
 
 
+@functools.lru_cache(maxsize=1)
 def load_workbook() -> Dict[str, SheetGrid]:
+    """Parsed workbook grids, loaded once per process.
+
+    Engines only read the grids (inputs go to per-engine overrides), so every
+    ExcelEngine can share the same sheets.
+    """
     if PARSED_PATH.exists():
         return _load_sheet_from_json(PARSED_PATH)
     return _load_fallback_dump()
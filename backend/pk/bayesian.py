@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import json
-import math
+from math import log as _log, pi as _PI
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
@@ -14,6 +14,9 @@ from backend.pk.sim import Event, concentration_time_series, simulate_regimen_0_
 DATA_DIR = Path(__file__).resolve().parents[2] / "data"
 PRIORS_PATH = DATA_DIR / "priors.json"
 
+_TWO_PI = 2 * _PI
+_HALF_LOG_2PI = 0.5 * _log(_TWO_PI)
+
 
 @dataclass
 class Priors:
@@ -37,9 +40,10 @@ def load_priors() -> Priors:
 
 def _lognorm_logpdf(x: float, mean: float, sigma_log: float) -> float:
     x = max(float(x), 1e-9)
-    mu = math.log(max(mean, 1e-9))
+    mu = _log(max(mean, 1e-9))
     s = max(float(sigma_log), 1e-6)
-    return -math.log(x * s * math.sqrt(2 * math.pi)) - ((math.log(x) - mu) ** 2) / (2 * s * s)
+    log_x = _log(x)
+    return -(log_x + _log(s) + _HALF_LOG_2PI) - ((log_x - mu) ** 2) / (2 * s * s)
 
 
 def _log_likelihood(
@@ -55,7 +59,7 @@ def _log_likelihood(
     sigma = np.sqrt((sigma_add ** 2) + (sigma_prop * pred) ** 2)
     sigma = np.maximum(sigma, 1e-6)
     resid = obs_c - pred
-    return -0.5 * float(np.sum((resid / sigma) ** 2 + np.log(2 * math.pi * sigma ** 2)))
+    return -0.5 * float(np.sum((resid / sigma) ** 2 + np.log(_TWO_PI * sigma ** 2)))
 
 
 def _neg_log_posterior(
@@ -254,6 +258,7 @@ def curve_with_band(
             interval_hr=events[1].start_hr - events[0].start_hr if len(events) > 1 else 12.0,
             infusion_hr=events[0].infusion_hr,
             dt_min=10.0,
+            cache=False,
         )
         samples.append(cc)
     stack = np.vstack(samples)
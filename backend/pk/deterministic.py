@@ -1,33 +1,39 @@
 from __future__ import annotations
 
+from math import exp as _exp
 from typing import Dict, List, Tuple
 
 import numpy as np
 
-from backend.pk.sim import auc_trapz, simulate_regimen_0_48h
+from backend.pk.sim import build_repeated_regimen_events, simulate_regimen_0_48h
 
 
-def _interp_at_time(t: np.ndarray, c: np.ndarray, time_hr: float) -> float:
-    """Linear interpolation of concentration at a timepoint."""
-    if time_hr <= float(t[0]):
-        return float(c[0])
-    if time_hr >= float(t[-1]):
-        return float(c[-1])
-    return float(np.interp(time_hr, t, c))
+def _summarize_curve(
+    t: np.ndarray,
+    c: np.ndarray,
+    peak_time_hr: float,
+    trough_time_hr: float,
+) -> Tuple[float, float, float]:
+    """AUC 0–24h plus interpolated peak/trough from a simulated curve starting at t=0.
 
+    `t` is sorted, so the 0–24h window is a prefix view rather than a masked copy, and
+    both timepoints go through one `np.interp` call (which clamps outside the curve).
+    """
+    end = int(np.searchsorted(t, 24.0, side="right"))
+    auc_0_24 = float(np.trapz(c[:end], t[:end])) if end >= 2 else 0.0
+    peak, trough = np.interp((peak_time_hr, trough_time_hr), t, c)
+    return auc_0_24, float(peak), float(trough)
 
-def compute_curve_and_metrics(
+
+def _regimen_curve(
     cl_l_hr: float,
     v_l: float,
     dose_mg: float,
     interval_hr: float,
     infusion_hr: float,
-    dt_min: float = 10.0,
-) -> Dict[str, object]:
-    """
-    Simulate 0–48h concentration-time curve and compute AUC/peak/trough
-    directly from the simulated curve.
-    """
+    dt_min: float,
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, float]]:
+    """Simulated 0–48h (t, c) plus the peak/trough evaluation times of the last interval."""
     t, c = simulate_regimen_0_48h(
         cl_l_hr=cl_l_hr,
         v_l=v_l,
@@ -36,25 +42,171 @@ def compute_curve_and_metrics(
         infusion_hr=infusion_hr,
         dt_min=dt_min,
     )
-    auc_0_24 = float(auc_trapz(t, c, 0.0, 24.0))
-
     horizon = float(t[-1])
     last_start = max(0.0, horizon - float(interval_hr))
-    peak_time = last_start + float(infusion_hr)
-    trough_time = last_start + float(interval_hr)
+    times = {
+        "peak_time_hr": last_start + float(infusion_hr),
+        "trough_time_hr": last_start + float(interval_hr),
+        "dt_min": float(dt_min),
+        "horizon_hr": horizon,
+    }
+    return t, c, times
+
 
-    peak = _interp_at_time(t, c, peak_time)
-    trough = _interp_at_time(t, c, trough_time)
+def _curve_payload(t: np.ndarray, c: np.ndarray, columns: bool) -> object:
+    if columns:
+        return {"t_hr": t.tolist(), "conc_mg_l": c.tolist()}
+    return [{"t_hr": float(tt), "conc_mg_l": float(cc)} for tt, cc in zip(t, c)]
 
-    curve = [{"t_hr": float(tt), "conc_mg_l": float(cc)} for tt, cc in zip(t, c)]
 
+def compute_curve_and_metrics(
+    cl_l_hr: float,
+    v_l: float,
+    dose_mg: float,
+    interval_hr: float,
+    infusion_hr: float,
+    dt_min: float = 10.0,
+    columns: bool = False,
+) -> Dict[str, object]:
+    """
+    Simulate 0–48h concentration-time curve and compute AUC/peak/trough
+    directly from the simulated curve.
+
+    With `columns=True` the curve is returned as {"t_hr": [...], "conc_mg_l": [...]}
+    instead of a list of {"t_hr", "conc_mg_l"} points.
+    """
+    t, c, times = _regimen_curve(cl_l_hr, v_l, dose_mg, interval_hr, infusion_hr, dt_min)
+    auc_0_24, peak, trough = _summarize_curve(t, c, times["peak_time_hr"], times["trough_time_hr"])
     return {
         "auc24": auc_0_24,
         "peak": peak,
         "trough": trough,
-        "curve": curve,
-        "peak_time_hr": peak_time,
-        "trough_time_hr": trough_time,
-        "dt_min": float(dt_min),
-        "horizon_hr": horizon,
+        "curve": _curve_payload(t, c, columns),
+        **times,
     }
+
+
+def compute_curve(
+    cl_l_hr: float,
+    v_l: float,
+    dose_mg: float,
+    interval_hr: float,
+    infusion_hr: float,
+    dt_min: float = 10.0,
+    columns: bool = False,
+) -> Dict[str, object]:
+    """`compute_curve_and_metrics` without the curve-derived AUC/peak/trough, for callers
+    that take those from `analytic_summary` and only need the curve and its timepoints."""
+    t, c, times = _regimen_curve(cl_l_hr, v_l, dose_mg, interval_hr, infusion_hr, dt_min)
+    return {"curve": _curve_payload(t, c, columns), **times}
+
+
+def analytic_summary(
+    cl_l_hr: float,
+    v_l: float,
+    dose_mg: float,
+    interval_hr: float,
+    infusion_hr: float,
+    horizon_hr: float = 48.0,
+) -> Tuple[float, float, float]:
+    """
+    Closed-form (auc24, peak, trough) for the same 0–48h repeated-dose regimen
+    that `compute_curve_and_metrics` simulates, without building the curve.
+
+    AUC is the exact 0–24h integral of the superposed infusions; peak/trough are
+    evaluated at the end of infusion / end of interval in the last interval.
+    """
+    cl = max(float(cl_l_hr), 1e-6)
+    v = max(float(v_l), 1e-6)
+    k = cl / v
+    tin = max(float(infusion_hr), 1e-6)
+    interval_hr = float(interval_hr)
+    if interval_hr <= 0:
+        return 0.0, 0.0, 0.0
+
+    rate_over_cl = float(dose_mg) / tin / cl
+    starts = [ev.start_hr for ev in build_repeated_regimen_events(dose_mg, interval_hr, tin, horizon_hr=horizon_hr)]
+    e_tin = _exp(-k * tin)
+
+    auc = 0.0
+    for s in starts:
+        span = 24.0 - s
+        if span <= 0:
+            break
+        if span <= tin:
+            auc += rate_over_cl * (span - (1.0 - _exp(-k * span)) / k)
+        else:
+            auc += rate_over_cl * (tin - (1.0 - e_tin) / k)
+            auc += rate_over_cl * (1.0 - e_tin) * (1.0 - _exp(-k * (span - tin))) / k
+
+    def conc_at(time_hr: float) -> float:
+        total = 0.0
+        for s in starts:
+            u = time_hr - s
+            if u < 0:
+                break
+            if u <= tin:
+                total += rate_over_cl * (1.0 - _exp(-k * u))
+            else:
+                total += rate_over_cl * (1.0 - e_tin) * _exp(-k * (u - tin))
+        return total
+
+    last_start = max(0.0, float(horizon_hr) - interval_hr)
+    peak = conc_at(min(last_start + tin, float(horizon_hr)))
+    trough = conc_at(min(last_start + interval_hr, float(horizon_hr)))
+    return auc, peak, trough
+
+
+def analytic_summary_batch(
+    cl_l_hr: np.ndarray,
+    v_l: np.ndarray,
+    dose_mg: np.ndarray,
+    interval_hr: np.ndarray,
+    infusion_hr: np.ndarray,
+    horizon_hr: float = 48.0,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Element-wise `analytic_summary` for a cohort: (auc24, peak, trough) arrays.
+
+    Each row's doses start at 0, interval, 2·interval, ... up to the horizon; rows
+    with fewer doses than the densest regimen have their extra columns masked out.
+    """
+    cl = np.maximum(np.asarray(cl_l_hr, dtype=float), 1e-6)[:, None]
+    v = np.maximum(np.asarray(v_l, dtype=float), 1e-6)[:, None]
+    k = cl / v
+    tin = np.maximum(np.asarray(infusion_hr, dtype=float), 1e-6)[:, None]
+    interval = np.asarray(interval_hr, dtype=float)[:, None]
+    valid_interval = interval > 0
+    safe_interval = np.where(valid_interval, interval, 1.0)
+
+    n_doses = np.floor(horizon_hr / safe_interval).astype(np.intp) + 1
+    index = np.arange(int(n_doses.max()))[None, :]
+    starts = index * safe_interval
+    given = (index < n_doses) & valid_interval
+
+    rate_over_cl = np.asarray(dose_mg, dtype=float)[:, None] / tin / cl
+    e_tin = np.exp(-k * tin)
+
+    # Doses starting after 24h are masked out below; their exponentials may overflow.
+    span = 24.0 - starts
+    with np.errstate(over="ignore", invalid="ignore"):
+        during = rate_over_cl * (span - (1.0 - np.exp(-k * span)) / k)
+        after = rate_over_cl * (tin - (1.0 - e_tin) / k) + rate_over_cl * (1.0 - e_tin) * (
+            1.0 - np.exp(-k * (span - tin))
+        ) / k
+    auc = np.where(given & (span > 0), np.where(span <= tin, during, after), 0.0).sum(axis=1)
+
+    def conc_at(time_hr: np.ndarray) -> np.ndarray:
+        u = time_hr - starts
+        with np.errstate(over="ignore", invalid="ignore"):
+            level = np.where(
+                u <= tin,
+                rate_over_cl * (1.0 - np.exp(-k * u)),
+                rate_over_cl * (1.0 - e_tin) * np.exp(-k * (u - tin)),
+            )
+        return np.where(given & (u >= 0), level, 0.0).sum(axis=1)
+
+    last_start = np.maximum(0.0, horizon_hr - safe_interval)
+    peak = conc_at(np.minimum(last_start + tin, horizon_hr))
+    trough = conc_at(np.minimum(last_start + safe_interval, horizon_hr))
+    valid = valid_interval[:, 0]
+    return np.where(valid, auc, 0.0), np.where(valid, peak, 0.0), np.where(valid, trough, 0.0)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import math
 from dataclasses import dataclass
 from typing import Iterable, List, Tuple
@@ -111,12 +112,42 @@ def simulate_regimen_0_48h(
     interval_hr: float,
     infusion_hr: float,
     dt_min: float = 10.0,
+    cache: bool = True,
 ) -> Tuple[np.ndarray, np.ndarray]:
-    horizon = 48.0
-    dt_hr = float(dt_min) / 60.0
-    t = np.arange(0.0, horizon + 1e-9, dt_hr)
-    events = build_repeated_regimen_events(dose_mg, interval_hr, infusion_hr, horizon_hr=horizon)
-    c = concentration_time_series(t, events, cl_l_hr=cl_l_hr, v_l=v_l)
+    """Simulate a repeated-dose regimen over 0–48h.
+
+    Concentrations are linear in dose and in 1/CL for a given k = CL/V, so the curve
+    is a per-(k, interval, infusion, dt) unit shape scaled by dose/CL. The unit shape
+    is cached unless `cache=False`, which posterior/band sampling passes since each
+    draw has its own k. The returned `t` is read-only and shared by every call with
+    the same `dt_min`.
+    """
+    cl = max(float(cl_l_hr), 1e-6)
+    v = max(float(v_l), 1e-6)
+    unit_curve = _unit_regimen_curve if cache else _unit_regimen_curve.__wrapped__
+    t, c_unit = unit_curve(cl / v, float(interval_hr), float(infusion_hr), float(dt_min))
+    return t, c_unit * (float(dose_mg) / cl)
+
+
+@functools.lru_cache(maxsize=8)
+def _time_grid(dt_min: float) -> np.ndarray:
+    t = np.arange(0.0, 48.0 + 1e-9, dt_min / 60.0)
+    t.setflags(write=False)
+    return t
+
+
+@functools.lru_cache(maxsize=256)
+def _unit_regimen_curve(
+    k: float,
+    interval_hr: float,
+    infusion_hr: float,
+    dt_min: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """0–48h curve for 1 mg doses with CL = 1 L/h and elimination rate `k` (read-only arrays)."""
+    t = _time_grid(dt_min)
+    events = build_repeated_regimen_events(1.0, interval_hr, infusion_hr, horizon_hr=48.0)
+    c = concentration_time_series(t, events, cl_l_hr=1.0, v_l=1.0 / k)
+    c.setflags(write=False)
     return t, c
 
 
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Dict, List, Tuple
+
+import numpy as np
 
 from utils import pk
 
@@ -42,6 +44,78 @@ def _interval_preference(interval_hr: float) -> int:
     return order.get(int(interval_hr), 99)
 
 
+def _candidate_grid() -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(dose, interval, infusion, daily dose, interval preference) for every candidate within
+    the dose guardrails, interval-major like the scalar search."""
+    doses = np.arange(DOSE_INCREMENT_MG, MAX_SINGLE_DOSE_MG + DOSE_INCREMENT_MG, DOSE_INCREMENT_MG)
+    infusions = np.array([infusion_hours_for_dose(d) for d in doses])
+    n_intervals = len(ALLOWED_INTERVALS_HR)
+    dose_grid = np.tile(doses, n_intervals)
+    infusion = np.tile(infusions, n_intervals)
+    interval_grid = np.repeat(np.asarray(ALLOWED_INTERVALS_HR), len(doses))
+    daily = dose_grid * (24.0 / interval_grid)
+    keep = daily <= MAX_DAILY_DOSE_MG
+    if not keep.any():
+        raise ValueError("No valid regimens within guardrails.")
+    preference = np.array([_interval_preference(i) for i in interval_grid[keep]])
+    return dose_grid[keep], interval_grid[keep], infusion[keep], daily[keep], preference
+
+
+# The guardrails are fixed at import, so the candidate grid is built once: as arrays for
+# the cohort search and as plain tuples for the single-patient loop.
+_GRID = _candidate_grid()
+_CANDIDATES = tuple(zip(*(column.tolist() for column in _GRID)))
+
+
+def _rank_candidates(
+    k_e: np.ndarray,
+    vd_l: np.ndarray,
+) -> Tuple[Tuple[np.ndarray, ...], Tuple[np.ndarray, ...], np.ndarray]:
+    """Score the candidate grid for each (k_e, Vd) pair.
+
+    Returns the grid, (auc24, peak, trough) with one row per patient, and each row's
+    candidate indices ordered best first.
+    """
+    dose_grid, interval_grid, infusion, daily, preference = _GRID
+    k_e = np.asarray(k_e, dtype=float).reshape(-1, 1)
+    vd_l = np.asarray(vd_l, dtype=float).reshape(-1, 1)
+
+    clearance = k_e * vd_l
+    with np.errstate(divide="ignore", invalid="ignore"):
+        auc = np.where(clearance > 0, daily / clearance, 0.0)
+    peak, trough = pk.predict_peak_trough(dose_grid, interval_grid, k_e, vd_l, infusion)
+
+    # Same ordering as sorting on (out of target, distance, interval preference,
+    # daily dose, trough) within each patient; lexsort takes its primary key last.
+    n_patients, n_candidates = auc.shape
+    in_target = (auc >= AUC_TARGET_LOW) & (auc <= AUC_TARGET_HIGH)
+    distance = np.where(
+        in_target,
+        np.abs(auc - AUC_TARGET_MID),
+        np.minimum(np.abs(auc - AUC_TARGET_LOW), np.abs(auc - AUC_TARGET_HIGH)),
+    )
+    order = np.lexsort(
+        (
+            trough.ravel(),
+            np.broadcast_to(daily, auc.shape).ravel(),
+            np.broadcast_to(preference, auc.shape).ravel(),
+            distance.ravel(),
+            (~in_target).ravel(),
+            np.repeat(np.arange(n_patients), n_candidates),
+        )
+    )
+    return _GRID[:4], (auc, peak, trough), order.reshape(n_patients, n_candidates) % n_candidates
+
+
+def target_warnings(auc24: float) -> List[str]:
+    """Warning when the recommended regimen's AUC24 falls outside the target range."""
+    if AUC_TARGET_LOW <= auc24 <= AUC_TARGET_HIGH:
+        return []
+    return [
+        f"Unable to reach {AUC_TARGET_LOW:.0f}-{AUC_TARGET_HIGH:.0f} mg·h/L with allowed constraints; closest is {auc24:.0f}."
+    ]
+
+
 def recommend_regimens(
     weight_kg: float,
     crcl: float,
@@ -53,55 +127,61 @@ def recommend_regimens(
     k_e = k_e or pk.elimination_constant(crcl)
     vd_l = vd_l or pk.volume_distribution(weight_kg)
 
-    candidates: List[CandidateRegimen] = []
-    for interval_hr in ALLOWED_INTERVALS_HR:
-        for dose_mg in range(DOSE_INCREMENT_MG, MAX_SINGLE_DOSE_MG + DOSE_INCREMENT_MG, DOSE_INCREMENT_MG):
-            infusion_hr = infusion_hours_for_dose(dose_mg)
-            daily_dose = dose_mg * (24.0 / interval_hr)
-            if daily_dose > MAX_DAILY_DOSE_MG:
-                continue
-            auc24 = pk.calculate_auc_24(dose_mg, interval_hr, k_e, vd_l)
-            peak = pk.predict_peak(dose_mg, interval_hr, k_e, vd_l, infusion_hr)
-            trough = pk.predict_trough(dose_mg, interval_hr, k_e, vd_l, infusion_hr)
-            candidates.append(
+    # A few dozen candidates: a plain loop beats array setup for one patient. Peak and
+    # trough are linear in dose, so the exponentials are evaluated once per
+    # (interval, infusion) pair and scaled.
+    clearance = k_e * vd_l
+    unit_levels: dict = {}
+    scored = []
+    for dose_mg, interval_hr, infusion_hr, daily_dose, preference in _CANDIDATES:
+        key = (interval_hr, infusion_hr)
+        if key not in unit_levels:
+            unit_levels[key] = pk.predict_peak_trough(1.0, interval_hr, k_e, vd_l, infusion_hr)
+        peak_per_mg, trough_per_mg = unit_levels[key]
+        auc24 = daily_dose / clearance if clearance > 0 else 0.0
+        trough = dose_mg * trough_per_mg
+        in_target = AUC_TARGET_LOW <= auc24 <= AUC_TARGET_HIGH
+        if in_target:
+            distance = abs(auc24 - AUC_TARGET_MID)
+        else:
+            distance = min(abs(auc24 - AUC_TARGET_LOW), abs(auc24 - AUC_TARGET_HIGH))
+        scored.append(
+            (
+                (not in_target, distance, preference, daily_dose, trough),
                 CandidateRegimen(
                     dose_mg=dose_mg,
                     interval_hr=interval_hr,
                     infusion_hr=infusion_hr,
                     auc24=auc24,
-                    peak=peak,
+                    peak=dose_mg * peak_per_mg,
                     trough=trough,
                     daily_dose_mg=daily_dose,
-                )
+                ),
             )
-
-    if not candidates:
-        raise ValueError("No valid regimens within guardrails.")
-
-    def score(candidate: CandidateRegimen) -> Tuple[int, float, int, float, float]:
-        in_target = AUC_TARGET_LOW <= candidate.auc24 <= AUC_TARGET_HIGH
-        if in_target:
-            distance = abs(candidate.auc24 - AUC_TARGET_MID)
-        else:
-            distance = min(abs(candidate.auc24 - AUC_TARGET_LOW), abs(candidate.auc24 - AUC_TARGET_HIGH))
-        return (
-            0 if in_target else 1,
-            distance,
-            _interval_preference(candidate.interval_hr),
-            candidate.daily_dose_mg,
-            candidate.trough,
         )
 
-    candidates_sorted = sorted(candidates, key=score)
-    best = candidates_sorted[0]
+    scored.sort(key=lambda item: item[0])
+    candidates_sorted = [candidate for _, candidate in scored]
+    return candidates_sorted, target_warnings(candidates_sorted[0].auc24)
 
-    warnings: List[str] = []
-    if not (AUC_TARGET_LOW <= best.auc24 <= AUC_TARGET_HIGH):
-        warnings.append(
-            f"Unable to reach {AUC_TARGET_LOW:.0f}-{AUC_TARGET_HIGH:.0f} mg·h/L with allowed constraints; closest is {best.auc24:.0f}."
-        )
 
-    return candidates_sorted, warnings
+def recommend_regimens_batch(k_e: np.ndarray, vd_l: np.ndarray) -> Dict[str, np.ndarray]:
+    """Best regimen for each (k_e, Vd) pair, scored in one pass over the candidate grid.
+
+    Returns arrays keyed like CandidateRegimen's fields, one entry per patient.
+    """
+    (dose_grid, interval_grid, infusion, daily), (auc, peak, trough), order = _rank_candidates(k_e, vd_l)
+    best = order[:, 0]
+    rows = np.arange(len(best))
+    return {
+        "dose_mg": dose_grid[best],
+        "interval_hr": interval_grid[best],
+        "infusion_hr": infusion[best],
+        "auc24": auc[rows, best],
+        "peak": peak[rows, best],
+        "trough": trough[rows, best],
+        "daily_dose_mg": daily[best],
+    }
 
 
 def recommend_regimen(
@@ -120,5 +200,5 @@ def loading_dose(weight_kg: float, serious: bool) -> float:
     """Loading dose 20-25 mg/kg (cap 3000 mg) for serious infections."""
     if not serious:
         return 0.0
-    return min(pk._round_to_increment(25 * weight_kg, 250), 3000)
+    return min(pk.round_to_increment(25 * weight_kg), 3000)
 
@@ -1,25 +1,37 @@
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict, Any
+from starlette.datastructures import Headers
+from starlette.types import Scope
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, validator
+from typing import List, Optional, Dict, Any, Set, Tuple, Type, TypeVar
 import numpy as np
+import orjson
 from scipy import optimize
 from scipy.stats import multivariate_normal
+import anyio
+import functools
+import mimetypes
+import stat
 import json
 import math
+from math import exp as _exp
 import os
 import uuid
 from datetime import datetime
 from enum import Enum
 from utils import pk
 from backend.pk import bayesian as bayesian_pk
-from backend.pk.deterministic import compute_curve_and_metrics
+from backend.pk.deterministic import analytic_summary, analytic_summary_batch, compute_curve
 from backend.pk.sim import Event, simulate_regimen_0_48h
 from backend.regimen_recommender import (
     recommend_regimen,
     recommend_regimens,
+    recommend_regimens_batch,
+    target_warnings,
     loading_dose as recommend_loading_dose,
 )
 from backend.pk_bayes import fit_map, simulate_posterior, rank_regimens
@@ -32,14 +44,13 @@ def _to_camel(s: str) -> str:
 
 
 class CamelModel(BaseModel):
-    class Config:
-        allow_population_by_field_name = True
-        alias_generator = _to_camel
+    model_config = ConfigDict(populate_by_name=True, alias_generator=_to_camel)
 
 app = FastAPI(
     title="Vancomyzer API",
     description="Evidence-based vancomycin dosing calculator following ASHP/IDSA 2020 guidelines",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware for web frontend
@@ -58,8 +69,63 @@ from pathlib import Path
 static_path = Path(__file__).parent / "static"
 build_info_path = static_path / "build-info.json"
 
-app.mount("/static", StaticFiles(directory=static_path, check_dir=False), name="static")
-app.mount("/assets", StaticFiles(directory=static_path / "assets", check_dir=False), name="assets")
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves a build-time `.br`/`.gz` sibling when the client accepts it.
+
+    Sidecars are written by scripts/render_build.sh; files without one are served as-is.
+    """
+
+    _SIDECARS = (("br", ".br"), ("gzip", ".gz"))
+
+    @staticmethod
+    def _accepted_encodings(accept_encoding: str) -> Set[str]:
+        """Codings the Accept-Encoding header allows; `q=0` rules a coding out, `*` allows the rest."""
+        accepted, refused = set(), set()
+        for token in accept_encoding.split(","):
+            coding, _, params = token.partition(";")
+            coding = coding.strip().lower()
+            if not coding:
+                continue
+            q = 1.0
+            for param in params.split(";"):
+                name, _, value = param.partition("=")
+                if name.strip().lower() == "q":
+                    try:
+                        q = float(value)
+                    except ValueError:
+                        q = 0.0
+            (accepted if q > 0 else refused).add(coding)
+        if "*" in accepted:
+            accepted.update(encoding for encoding, _ in PrecompressedStaticFiles._SIDECARS)
+        return accepted - refused
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        if accept_encoding and scope["method"] in ("GET", "HEAD"):
+            accepted = self._accepted_encodings(accept_encoding)
+            for encoding, suffix in self._SIDECARS:
+                if encoding not in accepted:
+                    continue
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+                if stat_result and stat.S_ISREG(stat_result.st_mode):
+                    response = self.file_response(full_path, stat_result, scope)
+                    media_type = mimetypes.guess_type(path)[0] or "text/plain"
+                    if media_type.startswith("text/"):
+                        media_type += "; charset=utf-8"
+                    response.headers["content-type"] = media_type
+                    response.headers["content-encoding"] = encoding
+                    response.headers["vary"] = "Accept-Encoding"
+                    return response
+        response = await super().get_response(path, scope)
+        # The identity body also depends on Accept-Encoding, so shared caches must key on it.
+        response.headers["vary"] = "Accept-Encoding"
+        return response
+
+
+app.mount("/static", PrecompressedStaticFiles(directory=static_path, check_dir=False), name="static")
+app.mount("/assets", PrecompressedStaticFiles(directory=static_path / "assets", check_dir=False), name="assets")
 
 if os.getenv("VANCO_DEBUG_ROUTES") == "1":
     @app.get("/api/routes")
@@ -67,8 +133,16 @@ if os.getenv("VANCO_DEBUG_ROUTES") == "1":
         return {"routes": sorted({route.path for route in app.routes if hasattr(route, "path")})}
 
 
+# Resolved once at import: the environment does not change while the process runs,
+# and a fixed fallback build time keeps /version responses stable between requests.
+_GIT_SHA_ENV = os.getenv("RENDER_GIT_COMMIT") or os.getenv("GIT_SHA")
+_STARTED_AT = datetime.utcnow().isoformat() + "Z"
+
+
+@functools.cache
 def _read_build_info() -> dict:
-    git_sha = os.getenv("RENDER_GIT_COMMIT") or os.getenv("GIT_SHA")
+    """Build metadata; build-info.json is written before the process starts, so read it once."""
+    git_sha = _GIT_SHA_ENV
     build_time = None
     if build_info_path.exists():
         try:
@@ -79,16 +153,26 @@ def _read_build_info() -> dict:
             pass
     return {
         "git_sha": git_sha or "unknown",
-        "build_time": build_time or datetime.utcnow().isoformat() + "Z",
+        "build_time": build_time or _STARTED_AT,
     }
 
 
-@app.get("/", response_class=HTMLResponse)
-def serve_index():
+_INDEX_HEADERS = {"Cache-Control": "no-store, no-cache, must-revalidate"}
+
+
+@functools.lru_cache(maxsize=1)
+def _index_html(mtime_ns: int) -> str:
+    """index.html with asset URLs rewritten to /static; keyed on mtime so a rebuild is picked up."""
     html = (static_path / "index.html").read_text()
     html = html.replace('src="/assets/', 'src="/static/assets/')
     html = html.replace('href="/assets/', 'href="/static/assets/')
-    return HTMLResponse(html, headers={"Cache-Control": "no-store, no-cache, must-revalidate"})
+    return html
+
+
+@app.get("/", response_class=HTMLResponse)
+def serve_index():
+    html = _index_html((static_path / "index.html").stat().st_mtime_ns)
+    return HTMLResponse(html, headers=_INDEX_HEADERS)
 
 
 @app.get("/build-info.json")
@@ -99,8 +183,8 @@ def build_info():
 
 
 @app.get("/api/version")
-@app.get("/version")
-def api_version():
+@app.get("/version", include_in_schema=False)
+async def api_version():
     info = _read_build_info()
     return {
         "app": "Vancomyzer",
@@ -111,8 +195,8 @@ def api_version():
 
 
 @app.get("/api/meta/version")
-@app.get("/meta/version")
-def meta_version():
+@app.get("/meta/version", include_in_schema=False)
+async def meta_version():
     return _read_build_info()
 
 # Data Models
@@ -267,15 +351,40 @@ class DoseResponse(BaseModel):
     method: str
     notes: List[str]
     concentration_curve: List[Dict[str, float]]
+    # Column layout ({"t_hr": [...], "conc_mg_l": [...]}) returned instead of
+    # concentration_curve when the client asks for `?soa=1`.
+    concentration_curve_columns: Optional[Dict[str, List[float]]] = None
     auc24_ci_low: Optional[float] = None
     auc24_ci_high: Optional[float] = None
     curve_ci_low: Optional[List[Dict[str, float]]] = None
     curve_ci_high: Optional[List[Dict[str, float]]] = None
+    curve_ci_columns: Optional[Dict[str, List[float]]] = None
     regimen_options: Optional[List[Dict[str, float]]] = None
     calculation_details: Optional[Dict[str, Any]] = None
     fit_diagnostics: Optional[Dict[str, Any]] = None
 
 
+class DoseBatchRequest(CamelModel):
+    patients: List[PatientInfo] = Field(..., min_length=1, max_length=1000)
+
+class DoseBatchResult(BaseModel):
+    loading_dose_mg: float
+    maintenance_dose_mg: float
+    interval_hours: float
+    infusion_hours: float
+    predicted_peak_mg_l: float
+    predicted_trough_mg_l: float
+    predicted_auc_24: float
+    k_e: float
+    vd_l: float
+    half_life_hours: float
+    crcl_ml_min: float
+    notes: List[str]
+
+class DoseBatchResponse(BaseModel):
+    results: List[DoseBatchResult]
+
+
 class BasicPatientPayload(BaseModel):
     age: int = Field(ge=0, le=120)
     sex: str = Field(..., pattern="^(male|female)$")
@@ -599,7 +708,7 @@ class VancomycinPKCalculator:
         v = pk_params['volume']
         
         # One-compartment model steady-state trough
-        trough = (dose / v) * (np.exp(-k * 1.0) / (1 - np.exp(-k * interval)))
+        trough = (dose / v) * (_exp(-k * 1.0) / (1 - _exp(-k * interval)))
         return trough
     
     def _calculate_peak(self, dose: float, pk_params: Dict[str, float], infusion_time: float = 1.0) -> float:
@@ -608,7 +717,7 @@ class VancomycinPKCalculator:
         v = pk_params['volume']
         
         # Peak at end of infusion
-        peak = (dose / (v * k * infusion_time)) * (1 - np.exp(-k * infusion_time))
+        peak = (dose / (v * k * infusion_time)) * (1 - _exp(-k * infusion_time))
         return peak
     
     def _generate_pk_curve(self, dose: float, interval: float, pk_params: Dict[str, float]) -> List[Dict[str, float]]:
@@ -616,27 +725,22 @@ class VancomycinPKCalculator:
         k = pk_params['elimination_rate']
         v = pk_params['volume']
         
-        curve_data = []
         time_points = np.linspace(0, 24, 100)
-        
-        for t in time_points:
-            # Calculate concentration at time t (steady state)
-            doses_given = int(t / interval) + 1
-            conc = 0
-            
-            for dose_num in range(doses_given):
-                dose_time = dose_num * interval
-                if dose_time <= t:
-                    time_since_dose = t - dose_time
-                    # Infusion + elimination
-                    conc += (dose / (v * k * 1.0)) * (1 - np.exp(-k * 1.0)) * np.exp(-k * (time_since_dose - 1.0))
-            
-            curve_data.append({
-                'time': float(t),
-                'concentration': max(float(conc), 0.0)
-            })
-        
-        return curve_data
+        doses_given = (time_points / interval).astype(int) + 1
+        amplitude = (dose / (v * k * 1.0)) * (1 - _exp(-k * 1.0))
+        
+        # Superpose one column of doses at a time over the whole time grid
+        conc = np.zeros_like(time_points)
+        for dose_num in range(int(doses_given.max())):
+            time_since_dose = time_points - dose_num * interval
+            given = (dose_num < doses_given) & (time_since_dose >= 0)
+            # Infusion + elimination
+            conc += np.where(given, amplitude * np.exp(-k * (np.where(given, time_since_dose, 0.0) - 1.0)), 0.0)
+        
+        return [
+            {'time': t, 'concentration': c}
+            for t, c in zip(time_points.tolist(), np.maximum(conc, 0.0).tolist())
+        ]
     
     def _calculate_auc_breakdown(self, dose: float, interval: float, pk_params: Dict[str, float]) -> Dict[str, Any]:
         """Calculate detailed AUC breakdown for visualization"""
@@ -809,7 +913,7 @@ class BayesianOptimizer:
         
         # Calculate predicted trough with CI
         k = individual_cl / individual_v
-        predicted_trough = (1000 / individual_v) * np.exp(-k * 12)  # 12h interval example
+        predicted_trough = (1000 / individual_v) * _exp(-k * 12)  # 12h interval example
         trough_ci_lower = predicted_trough * 0.8  # Approximate
         trough_ci_upper = predicted_trough * 1.2
         
@@ -837,11 +941,11 @@ class BayesianOptimizer:
         
         if time <= infusion_time:
             # During infusion
-            conc = (dose / (v * k * infusion_time)) * (1 - np.exp(-k * time))
+            conc = (dose / (v * k * infusion_time)) * (1 - _exp(-k * time))
         else:
             # After infusion
-            conc_end_infusion = (dose / (v * k * infusion_time)) * (1 - np.exp(-k * infusion_time))
-            conc = conc_end_infusion * np.exp(-k * (time - infusion_time))
+            conc_end_infusion = (dose / (v * k * infusion_time)) * (1 - _exp(-k * infusion_time))
+            conc = conc_end_infusion * _exp(-k * (time - infusion_time))
         
         return max(conc, 0.0)
     
@@ -864,19 +968,25 @@ class BayesianOptimizer:
     
     def _generate_individual_curve(self, cl: float, v: float) -> List[Dict[str, float]]:
         """Generate individual PK curve for visualization"""
-        curve_data = []
         time_points = np.linspace(0, 24, 100)
         dose = 1000  # mg
         interval = 12  # hours
+        infusion_time = 1.0
         
-        for t in time_points:
-            conc = self._predict_concentration(dose, t % interval, 1.0, cl, v)
-            curve_data.append({
-                'time': float(t),
-                'concentration': float(conc)
-            })
+        # Vectorized `_predict_concentration` over the time grid
+        k = cl / v
+        time = time_points % interval
+        conc_end_infusion = (dose / (v * k * infusion_time)) * (1 - _exp(-k * infusion_time))
+        conc = np.where(
+            time <= infusion_time,
+            (dose / (v * k * infusion_time)) * (1 - np.exp(-k * time)),
+            conc_end_infusion * np.exp(-k * (time - infusion_time)),
+        )
         
-        return curve_data
+        return [
+            {'time': t, 'concentration': c}
+            for t, c in zip(time_points.tolist(), np.maximum(conc, 0.0).tolist())
+        ]
 
 # Global instances
 pk_calculator = VancomycinPKCalculator()
@@ -910,25 +1020,104 @@ class ConnectionManager:
 
 manager = ConnectionManager()
 
+@functools.lru_cache(maxsize=4096)
+def _population_pk(
+    age_years: float,
+    weight_kg: float,
+    sex: str,
+    serum_creatinine: float,
+    height_cm: Optional[float],
+) -> Tuple[float, float, float]:
+    """Population (CrCl, k_e, Vd) for a patient; memoized for repeated slider recalculations."""
+    crcl = pk.cockcroft_gault(age_years, weight_kg, sex, serum_creatinine, height_cm)
+    return crcl, pk.elimination_constant(crcl), pk.volume_distribution(weight_kg)
+
+
+def _patient_pk(patient: PatientInfo) -> Tuple[float, float, float]:
+    return _population_pk(
+        patient.age_years,
+        patient.weight_kg,
+        patient.sex,
+        patient.serum_creatinine,
+        patient.height_cm,
+    )
+
+
+def _model_response(model: BaseModel) -> ORJSONResponse:
+    """Serialize a response model without FastAPI re-validating it.
+
+    Dose responses are built with `model_construct` from values computed here, so no
+    validation runs on the way out either.
+    """
+    return ORJSONResponse(content=model.model_dump())
+
+
+_RequestModel = TypeVar("_RequestModel", bound=BaseModel)
+
+
+async def _decode_body(request: Request, model: Type[_RequestModel]) -> _RequestModel:
+    """Parse and validate the raw JSON body in a single pydantic-core pass.
+
+    Skips the intermediate dict FastAPI builds for body parameters; errors are
+    reported in the same 422 shape FastAPI uses.
+    """
+    try:
+        return model.model_validate_json(await request.body())
+    except ValidationError as exc:
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in exc.errors(include_url=False)]
+        )
+
+
+def _json_body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    """OpenAPI requestBody for endpoints that decode their body with `_decode_body`."""
+    schema = model.model_json_schema(by_alias=True)
+    defs = schema.pop("$defs", {})
+
+    def inline(node):
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return inline(defs[node["$ref"].rsplit("/", 1)[-1]])
+            return {key: inline(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [inline(value) for value in node]
+        return node
+
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": inline(schema)}},
+        }
+    }
+
 # API Endpoints
 
 @app.get("/api/health")
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
-@app.post("/api/calculate-dose", response_model=DoseResponse)
-async def calculate_dose_endpoint(request: DoseRequest):
-    """Guideline-based dosing using traditional PK equations."""
+
+# Liveness probe body never changes, so it is encoded once and sent as-is.
+_LIVENESS_BYTES = orjson.dumps({"status": "ok"})
+
+
+@app.get("/health", include_in_schema=False)
+@app.get("/healthz", include_in_schema=False)
+async def liveness():
+    return Response(content=_LIVENESS_BYTES, media_type="application/json")
+
+@app.post("/api/calculate-dose", response_model=DoseResponse, openapi_extra=_json_body_openapi(DoseRequest))
+async def calculate_dose_endpoint(request: Request, soa: bool = False):
+    """Guideline-based dosing using traditional PK equations.
+
+    `soa=1` returns the concentration curve as columns (concentration_curve_columns).
+    """
+    return await _calculate_dose(await _decode_body(request, DoseRequest), soa=soa)
+
+
+async def _calculate_dose(request: DoseRequest, soa: bool = False) -> ORJSONResponse:
     patient = request.patient
-    crcl = pk.cockcroft_gault(
-        patient.age_years,
-        patient.weight_kg,
-        patient.sex,
-        patient.serum_creatinine,
-        patient.height_cm,
-    )
-    k_e = pk.elimination_constant(crcl)
-    vd = pk.volume_distribution(patient.weight_kg)
+    crcl, k_e, vd = _patient_pk(patient)
     options, warnings = recommend_regimens(
         weight_kg=patient.weight_kg,
         crcl=crcl,
@@ -945,34 +1134,44 @@ async def calculate_dose_endpoint(request: DoseRequest):
     chosen_dose = regimen_override.dose_mg if regimen_override else recommended.dose_mg
     chosen_interval = regimen_override.interval_hr if regimen_override else recommended.interval_hr
     chosen_infusion = regimen_override.infusion_hr if regimen_override else recommended.infusion_hr
-    metrics = compute_curve_and_metrics(
+    metrics = compute_curve(
         cl_l_hr=k_e * vd,
         v_l=vd,
         dose_mg=chosen_dose,
         interval_hr=chosen_interval,
         infusion_hr=chosen_infusion,
         dt_min=10.0,
+        columns=soa,
     )
     curve = metrics["curve"]
+    # Headline metrics use the same closed form as the regimen options below, so the
+    # recommended regimen reports one AUC/peak/trough wherever it appears.
+    auc24, peak, trough = analytic_summary(
+        cl_l_hr=k_e * vd,
+        v_l=vd,
+        dose_mg=chosen_dose,
+        interval_hr=chosen_interval,
+        infusion_hr=chosen_infusion,
+    )
 
     option_payload: List[Dict[str, float]] = []
     for candidate in options[:5]:
-        option_metrics = compute_curve_and_metrics(
+        # Options only need the summary metrics, so skip building a 0–48h curve.
+        option_auc24, option_peak, option_trough = analytic_summary(
             cl_l_hr=k_e * vd,
             v_l=vd,
             dose_mg=candidate.dose_mg,
             interval_hr=candidate.interval_hr,
             infusion_hr=candidate.infusion_hr,
-            dt_min=10.0,
         )
         option_payload.append(
             {
                 "dose_mg": float(candidate.dose_mg),
                 "interval_hr": float(candidate.interval_hr),
                 "infusion_hr": float(candidate.infusion_hr),
-                "auc24": float(option_metrics["auc24"]),
-                "peak": float(option_metrics["peak"]),
-                "trough": float(option_metrics["trough"]),
+                "auc24": float(option_auc24),
+                "peak": float(option_peak),
+                "trough": float(option_trough),
                 "daily_dose_mg": float(candidate.daily_dose_mg),
             }
         )
@@ -981,30 +1180,31 @@ async def calculate_dose_endpoint(request: DoseRequest):
         notes.append(
             f"Regimen override applied: {chosen_dose:.0f} mg q{chosen_interval:g}h (infusion {chosen_infusion:g}h)."
         )
-    return DoseResponse(
-        loading_dose_mg=recommend_loading_dose(patient.weight_kg, patient.serious_infection),
-        maintenance_dose_mg=recommended.dose_mg,
-        interval_hours=recommended.interval_hr,
-        infusion_hours=recommended.infusion_hr,
-        predicted_peak_mg_l=float(metrics["peak"]),
-        predicted_trough_mg_l=float(metrics["trough"]),
-        predicted_auc_24=float(metrics["auc24"]),
+    response = DoseResponse.model_construct(
+        loading_dose_mg=float(recommend_loading_dose(patient.weight_kg, patient.serious_infection)),
+        maintenance_dose_mg=float(recommended.dose_mg),
+        interval_hours=float(recommended.interval_hr),
+        infusion_hours=float(recommended.infusion_hr),
+        predicted_peak_mg_l=float(peak),
+        predicted_trough_mg_l=float(trough),
+        predicted_auc_24=float(auc24),
         k_e=k_e,
         vd_l=vd,
         half_life_hours=pk.half_life_hours(k_e),
         crcl_ml_min=crcl,
         method="population_recommender",
         notes=notes,
-        concentration_curve=curve,
+        concentration_curve=[] if soa else curve,
+        concentration_curve_columns=curve if soa else None,
         regimen_options=option_payload,
         calculation_details={
             "model": "1-compartment IV infusion (first-order elimination)",
             "method": "Deterministic population PK",
-            "auc_method": "Trapezoidal (0–24h) from simulated curve",
-            "assumptions": "Simulate repeated doses 0–48h at 10-min resolution; peak at end of infusion in last interval; trough just before next dose.",
+            "auc_method": "Closed-form integral (0–24h) of the superposed infusions",
+            "assumptions": "Repeated doses superposed over 0–48h; AUC, peak and trough evaluated exactly, curve sampled at 10-min resolution for display; peak at end of infusion in last interval; trough just before next dose.",
             "formulas": {
                 "cl": "CL = k_e × V",
-                "auc": "AUC24 = trapezoid(curve, 0–24h)",
+                "auc": "AUC24 = ∫₀²⁴ Σ C_dose(t) dt (exact, per-infusion closed form)",
             },
             "peak_time_hr": metrics["peak_time_hr"],
             "trough_time_hr": metrics["trough_time_hr"],
@@ -1023,6 +1223,7 @@ async def calculate_dose_endpoint(request: DoseRequest):
             },
         },
     )
+    return _model_response(response)
 
 
 @app.post("/api/basic/calculate", response_model=DoseResponse)
@@ -1044,7 +1245,7 @@ async def basic_calculate_alias(payload: BasicCalculateAlias):
             infusion_hr=payload.regimen.infusion_hr or 1.0,
         ),
     )
-    return await calculate_dose_endpoint(dose_request)
+    return await _calculate_dose(dose_request)
 
 # Route alias for trailing slash and legacy callers.
 app.add_api_route(
@@ -1052,7 +1253,7 @@ app.add_api_route(
     basic_calculate_alias,
     methods=["POST"],
     response_model=DoseResponse,
-    include_in_schema=True,
+    include_in_schema=False,
 )
 app.add_api_route(
     "/api/calculate-dose/",
@@ -1062,17 +1263,103 @@ app.add_api_route(
     include_in_schema=False,
 )
 
-@app.post("/api/bayesian-dose", response_model=DoseResponse)
-async def bayesian_dose_endpoint(request: DoseRequest):
-    """Bayesian/Sawchuk–Zaske adjustment when levels are available."""
-    patient = request.patient
-    crcl = pk.cockcroft_gault(
-        patient.age_years,
-        patient.weight_kg,
-        patient.sex,
-        patient.serum_creatinine,
-        patient.height_cm,
+def _posterior_curve_band(
+    samples: np.ndarray,
+    dose_mg: float,
+    interval_hr: float,
+    infusion_hr: float,
+) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """95% band (t, lower, upper) of simulated 0–48h curves across posterior (CL, V) samples.
+
+    Every sample is simulated on the same time grid, so `t` comes from the sample
+    runs rather than a separate simulation of the MAP estimate.
+    """
+    t = None
+    sample_curves = []
+    for cl_s, v_s in samples:
+        t, c_s = simulate_regimen_0_48h(
+            cl_l_hr=float(cl_s),
+            v_l=float(v_s),
+            dose_mg=dose_mg,
+            interval_hr=interval_hr,
+            infusion_hr=infusion_hr,
+            dt_min=10.0,
+            cache=False,
+        )
+        sample_curves.append(c_s)
+    if not sample_curves:
+        return None
+    stack = np.vstack(sample_curves)
+    lower = np.percentile(stack, 2.5, axis=0)
+    upper = np.percentile(stack, 97.5, axis=0)
+    return t, lower, upper
+
+
+@app.post(
+    "/api/calculate-dose/batch",
+    response_model=DoseBatchResponse,
+    openapi_extra=_json_body_openapi(DoseBatchRequest),
+)
+async def calculate_dose_batch_endpoint(request: Request):
+    """Guideline-based regimens for a cohort (e.g. what-if tables) in one request.
+
+    Population PK, the regimen search and the predicted levels run as array operations
+    across all patients. Each row matches `/api/calculate-dose` for that patient: AUC is
+    the 0–24h closed-form integral and peak/trough are taken in the last interval of 48h.
+    """
+    patients = (await _decode_body(request, DoseBatchRequest)).patients
+    n = len(patients)
+    weight = np.fromiter((p.weight_kg for p in patients), dtype=float, count=n)
+    serious = np.fromiter((p.serious_infection for p in patients), dtype=bool, count=n)
+    crcl, k_e, vd = pk.population_pk_batch(
+        np.fromiter((p.age_years for p in patients), dtype=float, count=n),
+        weight,
+        np.fromiter((p.sex == "female" for p in patients), dtype=bool, count=n),
+        np.fromiter((p.serum_creatinine for p in patients), dtype=float, count=n),
+        np.fromiter((p.height_cm or 0.0 for p in patients), dtype=float, count=n),
     )
+    best = recommend_regimens_batch(k_e, vd)
+    auc24, peak, trough = analytic_summary_batch(k_e * vd, vd, best["dose_mg"], best["interval_hr"], best["infusion_hr"])
+    loading = np.where(serious, np.minimum(pk.round_to_increment(25 * weight), 3000), 0).astype(float)
+    half_life = 0.693 / np.maximum(k_e, 0.001)
+
+    columns = {
+        "loading_dose_mg": loading,
+        "maintenance_dose_mg": best["dose_mg"].astype(float),
+        "interval_hours": best["interval_hr"].astype(float),
+        "infusion_hours": best["infusion_hr"],
+        "predicted_peak_mg_l": peak,
+        "predicted_trough_mg_l": trough,
+        "predicted_auc_24": auc24,
+        "k_e": k_e,
+        "vd_l": vd,
+        "half_life_hours": half_life,
+        "crcl_ml_min": crcl,
+    }
+    results = []
+    # Notes are judged on the regimen search's AUC, as /api/calculate-dose does.
+    for row, search_auc in zip(zip(*(values.tolist() for values in columns.values())), best["auc24"].tolist()):
+        item = dict(zip(columns, row))
+        notes = target_warnings(search_auc)
+        if search_auc >= 800:
+            notes.append("Predicted AUC exceeds 800 mg·h/L; consider dose reduction.")
+        item["notes"] = notes
+        results.append(item)
+    return ORJSONResponse(content={"results": results})
+
+
+@app.post("/api/bayesian-dose", response_model=DoseResponse, openapi_extra=_json_body_openapi(DoseRequest))
+async def bayesian_dose_endpoint(request: Request, soa: bool = False):
+    """Bayesian/Sawchuk–Zaske adjustment when levels are available.
+
+    `soa=1` returns the curve and its 95% band as columns instead of point lists.
+    """
+    return await _bayesian_dose(await _decode_body(request, DoseRequest), soa=soa)
+
+
+async def _bayesian_dose(request: DoseRequest, soa: bool = False) -> ORJSONResponse:
+    patient = request.patient
+    crcl, fallback_ke, fallback_vd = _patient_pk(patient)
 
     levels = request.levels or []
     if not levels:
@@ -1080,8 +1367,6 @@ async def bayesian_dose_endpoint(request: DoseRequest):
 
     dose_history = request.dose_history or []
     level_payload = [{"level_mg_l": l.level_mg_l, "time_hours": l.time_hours} for l in levels]
-    fallback_ke = pk.elimination_constant(crcl)
-    fallback_vd = pk.volume_distribution(patient.weight_kg)
 
     if dose_history:
         events = [
@@ -1105,7 +1390,9 @@ async def bayesian_dose_endpoint(request: DoseRequest):
 
     levels_for_fit = [(l["time_hours"], l["level_mg_l"]) for l in level_payload]
     cl_mean = fallback_ke * fallback_vd
-    cl_map, v_map, samples = bayesian_pk.posterior_samples(events, levels_for_fit, cl_mean, fallback_vd)
+    cl_map, v_map, samples = await run_in_threadpool(
+        bayesian_pk.posterior_samples, events, levels_for_fit, cl_mean, fallback_vd
+    )
     k_e = cl_map / max(v_map, 1e-6)
     vd = v_map
     method = "bayesian_map"
@@ -1135,44 +1422,41 @@ async def bayesian_dose_endpoint(request: DoseRequest):
             f"Regimen override applied: {chosen_dose:.0f} mg q{chosen_interval:g}h (infusion {chosen_infusion:g}h)."
         )
 
-    metrics = compute_curve_and_metrics(
+    metrics = compute_curve(
         cl_l_hr=k_e * vd,
         v_l=vd,
         dose_mg=chosen_dose,
         interval_hr=chosen_interval,
         infusion_hr=chosen_infusion,
         dt_min=10.0,
+        columns=soa,
     )
     curve = metrics["curve"]
-
-    t, _ = simulate_regimen_0_48h(
+    # Headline metrics use the same closed form as the regimen options below, so the
+    # recommended regimen reports one AUC/peak/trough wherever it appears.
+    auc24, peak, trough = analytic_summary(
         cl_l_hr=k_e * vd,
         v_l=vd,
         dose_mg=chosen_dose,
         interval_hr=chosen_interval,
         infusion_hr=chosen_infusion,
-        dt_min=10.0,
     )
-    sample_curves = []
-    for cl_s, v_s in samples[:120]:
-        _, c_s = simulate_regimen_0_48h(
-            cl_l_hr=float(cl_s),
-            v_l=float(v_s),
-            dose_mg=chosen_dose,
-            interval_hr=chosen_interval,
-            infusion_hr=chosen_infusion,
-            dt_min=10.0,
-        )
-        sample_curves.append(c_s)
-    if sample_curves:
-        stack = np.vstack(sample_curves)
-        lower = np.percentile(stack, 2.5, axis=0)
-        upper = np.percentile(stack, 97.5, axis=0)
-        curve_ci_low = [{"t_hr": float(tt), "conc_mg_l": float(cc)} for tt, cc in zip(t, lower)]
-        curve_ci_high = [{"t_hr": float(tt), "conc_mg_l": float(cc)} for tt, cc in zip(t, upper)]
-    else:
-        curve_ci_low = None
-        curve_ci_high = None
+
+    band = await run_in_threadpool(
+        _posterior_curve_band,
+        samples[:120],
+        chosen_dose,
+        chosen_interval,
+        chosen_infusion,
+    )
+    curve_ci_low = curve_ci_high = curve_ci_columns = None
+    if band is not None:
+        t_band, lower, upper = band
+        if soa:
+            curve_ci_columns = {"t_hr": t_band.tolist(), "low": lower.tolist(), "high": upper.tolist()}
+        else:
+            curve_ci_low = [{"t_hr": float(tt), "conc_mg_l": float(cc)} for tt, cc in zip(t_band, lower)]
+            curve_ci_high = [{"t_hr": float(tt), "conc_mg_l": float(cc)} for tt, cc in zip(t_band, upper)]
 
     auc_samples = []
     for cl_s, v_s in samples[:120]:
@@ -1183,55 +1467,57 @@ async def bayesian_dose_endpoint(request: DoseRequest):
 
     option_payload: List[Dict[str, float]] = []
     for candidate in options[:5]:
-        option_metrics = compute_curve_and_metrics(
+        # Options only need the summary metrics, so skip building a 0–48h curve.
+        option_auc24, option_peak, option_trough = analytic_summary(
             cl_l_hr=k_e * vd,
             v_l=vd,
             dose_mg=candidate.dose_mg,
             interval_hr=candidate.interval_hr,
             infusion_hr=candidate.infusion_hr,
-            dt_min=10.0,
         )
         option_payload.append(
             {
                 "dose_mg": float(candidate.dose_mg),
                 "interval_hr": float(candidate.interval_hr),
                 "infusion_hr": float(candidate.infusion_hr),
-                "auc24": float(option_metrics["auc24"]),
-                "peak": float(option_metrics["peak"]),
-                "trough": float(option_metrics["trough"]),
+                "auc24": float(option_auc24),
+                "peak": float(option_peak),
+                "trough": float(option_trough),
                 "daily_dose_mg": float(candidate.daily_dose_mg),
             }
         )
 
 
-    return DoseResponse(
-        loading_dose_mg=recommend_loading_dose(patient.weight_kg, patient.serious_infection),
-        maintenance_dose_mg=recommended.dose_mg,
-        interval_hours=recommended.interval_hr,
-        infusion_hours=recommended.infusion_hr,
-        predicted_peak_mg_l=float(metrics["peak"]),
-        predicted_trough_mg_l=float(metrics["trough"]),
-        predicted_auc_24=float(metrics["auc24"]),
+    response = DoseResponse.model_construct(
+        loading_dose_mg=float(recommend_loading_dose(patient.weight_kg, patient.serious_infection)),
+        maintenance_dose_mg=float(recommended.dose_mg),
+        interval_hours=float(recommended.interval_hr),
+        infusion_hours=float(recommended.infusion_hr),
+        predicted_peak_mg_l=float(peak),
+        predicted_trough_mg_l=float(trough),
+        predicted_auc_24=float(auc24),
         k_e=k_e,
         vd_l=vd,
         half_life_hours=pk.half_life_hours(k_e),
         crcl_ml_min=crcl,
         method=f"{method}_recommender",
         notes=notes,
-        concentration_curve=curve,
+        concentration_curve=[] if soa else curve,
+        concentration_curve_columns=curve if soa else None,
         auc24_ci_low=auc_ci_low,
         auc24_ci_high=auc_ci_high,
         curve_ci_low=curve_ci_low,
         curve_ci_high=curve_ci_high,
+        curve_ci_columns=curve_ci_columns,
         regimen_options=option_payload,
         calculation_details={
             "model": "1-compartment IV infusion (first-order elimination)",
             "method": "Bayesian MAP fit",
-            "auc_method": "Trapezoidal (0–24h) from simulated curve",
-            "assumptions": "Simulate repeated doses 0–48h at 10-min resolution; peak at end of infusion in last interval; trough just before next dose.",
+            "auc_method": "Closed-form integral (0–24h) of the superposed infusions",
+            "assumptions": "Repeated doses superposed over 0–48h; AUC, peak and trough evaluated exactly, curve sampled at 10-min resolution for display; peak at end of infusion in last interval; trough just before next dose.",
             "formulas": {
                 "cl": "CL = k_e × V",
-                "auc": "AUC24 = trapezoid(curve, 0–24h)",
+                "auc": "AUC24 = ∫₀²⁴ Σ C_dose(t) dt (exact, per-infusion closed form)",
             },
             "peak_time_hr": metrics["peak_time_hr"],
             "trough_time_hr": metrics["trough_time_hr"],
@@ -1267,11 +1553,16 @@ async def bayesian_dose_endpoint(request: DoseRequest):
             ],
         },
     )
+    return _model_response(response)
 
 # Route alias for bayesian endpoint with trailing slash
-@app.post("/api/bayesian-dose/")
-async def bayesian_dose_endpoint_slash(request: DoseRequest):
-    return await bayesian_dose_endpoint(request)
+app.add_api_route(
+    "/api/bayesian-dose/",
+    bayesian_dose_endpoint,
+    methods=["POST"],
+    response_model=DoseResponse,
+    include_in_schema=False,
+)
 
 
 def _bayes_fit_guardrails(patient: PatientInfo, samples: list) -> List[str]:
@@ -1281,10 +1572,7 @@ def _bayes_fit_guardrails(patient: PatientInfo, samples: list) -> List[str]:
         rejections.append("weight_kg must be in (0, 300]")
     if patient.serum_creatinine <= 0 or patient.serum_creatinine > 20:
         rejections.append("serum_creatinine must be in (0, 20]")
-    crcl = pk.cockcroft_gault(
-        patient.age_years, patient.weight_kg, patient.sex,
-        patient.serum_creatinine, patient.height_cm,
-    )
+    crcl, _, _ = _patient_pk(patient)
     if crcl < 5:
         rejections.append("CrCl < 5 mL/min: model may extrapolate poorly")
     for s in samples:
@@ -1315,13 +1603,7 @@ async def bayes_fit_endpoint(request: BayesFitRequest):
     except KeyError:
         raise HTTPException(status_code=400, detail=f"Unknown model: {request.model_name}")
 
-    crcl = pk.cockcroft_gault(
-        request.patient.age_years,
-        request.patient.weight_kg,
-        request.patient.sex,
-        request.patient.serum_creatinine,
-        request.patient.height_cm,
-    )
+    crcl, _, _ = _patient_pk(request.patient)
     covariates = {
         "weight_kg": request.patient.weight_kg,
         "crcl_ml_min": crcl,
@@ -1351,14 +1633,14 @@ async def bayes_fit_endpoint(request: BayesFitRequest):
             ext_warnings.append(f"CrCl {crcl:.0f} mL/min outside prior range [{c_min}, {c_max}]; extrapolation.")
 
     try:
-        fit_result = fit_map(covariates, regimen_dicts, samples_dicts, pop_model)
+        fit_result = await run_in_threadpool(fit_map, covariates, regimen_dicts, samples_dicts, pop_model)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
     # Posterior predictive
     times_hr = np.linspace(0, 24, 241)
     try:
-        post_sim = simulate_posterior(fit_result, regimen_dicts, times_h=times_hr, n=1000)
+        post_sim = await run_in_threadpool(simulate_posterior, fit_result, regimen_dicts, times_h=times_hr, n=1000)
     except Exception as e:
         post_sim = None
 
@@ -1375,7 +1657,7 @@ async def bayes_fit_endpoint(request: BayesFitRequest):
         {"dose_mg": dose_mg, "interval_hr": 24, "infusion_hr": 1.0},
     ]
     try:
-        ranked = rank_regimens(fit_result, candidates, n_sim=300)
+        ranked = await run_in_threadpool(rank_regimens, fit_result, candidates, n_sim=300)
         regimen_options = [
             {
                 "dose_mg": r.dose_mg,
@@ -1467,7 +1749,7 @@ async def calculate_dosing(patient: PatientInput):
 async def bayesian_optimization(patient: PatientInput, levels: List[VancomycinLevel]):
     """Perform Bayesian optimization using measured vancomycin levels"""
     try:
-        result = bayesian_optimizer.optimize_dosing(patient, levels)
+        result = await run_in_threadpool(bayesian_optimizer.optimize_dosing, patient, levels)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,6 +1,7 @@
 import numpy as np
 
 from backend.pk import deterministic
+from backend.pk.sim import build_repeated_regimen_events, concentration_time_series, simulate_regimen_0_48h
 from utils import pk
 
 
@@ -43,3 +44,60 @@ def test_deterministic_metrics_match_curve():
     # AUC consistency with curve integration
     auc_curve = float(np.trapz(c[(t >= 0) & (t <= 24)], t[(t >= 0) & (t <= 24)]))
     assert abs(result["auc24"] - auc_curve) < 0.05
+
+
+def test_analytic_summary_matches_simulated_metrics():
+    crcl = pk.cockcroft_gault(60, 80, "female", 1.1, 165)
+    k_e = pk.elimination_constant(crcl)
+    vd = pk.volume_distribution(80)
+
+    for dose_mg, interval_hr, infusion_hr in [(1000, 12, 1.0), (1500, 8, 1.5), (2000, 24, 2.0)]:
+        sim = deterministic.compute_curve_and_metrics(
+            cl_l_hr=k_e * vd,
+            v_l=vd,
+            dose_mg=dose_mg,
+            interval_hr=interval_hr,
+            infusion_hr=infusion_hr,
+            dt_min=10.0,
+        )
+        auc24, peak, trough = deterministic.analytic_summary(
+            cl_l_hr=k_e * vd,
+            v_l=vd,
+            dose_mg=dose_mg,
+            interval_hr=interval_hr,
+            infusion_hr=infusion_hr,
+        )
+
+        assert abs(auc24 - sim["auc24"]) / sim["auc24"] < 0.005
+        assert abs(peak - sim["peak"]) < 0.01
+        assert abs(trough - sim["trough"]) < 0.01
+
+
+def test_curve_columns_match_records():
+    kwargs = dict(cl_l_hr=4.0, v_l=50.0, dose_mg=1000, interval_hr=12, infusion_hr=1.0, dt_min=10.0)
+    records = deterministic.compute_curve_and_metrics(**kwargs)
+    columns = deterministic.compute_curve_and_metrics(columns=True, **kwargs)
+
+    assert columns["curve"]["t_hr"] == [p["t_hr"] for p in records["curve"]]
+    assert columns["curve"]["conc_mg_l"] == [p["conc_mg_l"] for p in records["curve"]]
+    assert columns["auc24"] == records["auc24"]
+
+    curve_only = deterministic.compute_curve(**kwargs)
+    assert curve_only["curve"] == records["curve"]
+    assert curve_only["peak_time_hr"] == records["peak_time_hr"]
+    assert "auc24" not in curve_only
+
+
+def test_cached_unit_curve_matches_direct_superposition():
+    for dose_mg, cl, v in [(1000.0, 4.0, 50.0), (1750.0, 4.0, 50.0), (1000.0, 2.0, 25.0)]:
+        t, c = simulate_regimen_0_48h(cl_l_hr=cl, v_l=v, dose_mg=dose_mg, interval_hr=12.0, infusion_hr=1.5)
+        events = build_repeated_regimen_events(dose_mg, 12.0, 1.5, horizon_hr=48.0)
+        expected = concentration_time_series(np.array(t), events, cl_l_hr=cl, v_l=v)
+        assert np.allclose(c, expected, rtol=1e-12, atol=0.0)
+    assert not t.flags.writeable
+
+    kwargs = dict(cl_l_hr=3.3, v_l=41.0, dose_mg=1250.0, interval_hr=8.0, infusion_hr=1.0)
+    cached_t, cached_c = simulate_regimen_0_48h(**kwargs)
+    uncached_t, uncached_c = simulate_regimen_0_48h(cache=False, **kwargs)
+    assert uncached_t is cached_t
+    assert np.array_equal(uncached_c, cached_c)
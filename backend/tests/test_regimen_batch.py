@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.regimen_recommender import loading_dose, recommend_regimens, recommend_regimens_batch
+from backend.server import app
+from backend.utils.pk import population_pk_batch
+from utils import pk
+
+
+def test_batch_matches_single_patient_recommendations():
+    patients = [
+        (25, 65, "male", 1.0, 175),
+        (67, 183.5, "male", 1.24, 168),
+        (80, 140, "female", 2.5, 160),
+        (30, 50, "female", 0.6, None),
+    ]
+    crcl, k_e, vd = population_pk_batch(
+        np.array([p[0] for p in patients]),
+        np.array([p[1] for p in patients]),
+        np.array([p[2] == "female" for p in patients]),
+        np.array([p[3] for p in patients]),
+        np.array([p[4] or np.nan for p in patients]),
+    )
+    best = recommend_regimens_batch(k_e, vd)
+
+    for i, (age, weight, sex, scr, height) in enumerate(patients):
+        single_crcl = pk.cockcroft_gault(age, weight, sex, scr, height)
+        assert abs(crcl[i] - single_crcl) < 1e-9
+        assert abs(k_e[i] - pk.elimination_constant(single_crcl)) < 1e-12
+        assert vd[i] == pk.volume_distribution(weight)
+
+        options, _ = recommend_regimens(weight, single_crcl, False, k_e=k_e[i], vd_l=vd[i])
+        assert best["dose_mg"][i] == options[0].dose_mg
+        assert best["interval_hr"][i] == options[0].interval_hr
+        assert abs(best["auc24"][i] - options[0].auc24) < 1e-9
+        assert abs(best["trough"][i] - options[0].trough) < 1e-9
+
+
+def test_predict_levels_accept_arrays():
+    doses = np.array([500.0, 1000.0, 1750.0])
+    intervals = np.array([8.0, 12.0, 24.0])
+    peaks = pk.predict_peak(doses, intervals, 0.08, 50.0, 1.5)
+    troughs = pk.predict_trough(doses, intervals, 0.08, 50.0, 1.5)
+
+    for i in range(len(doses)):
+        assert abs(peaks[i] - pk.predict_peak(doses[i], intervals[i], 0.08, 50.0, 1.5)) < 1e-9
+        assert abs(troughs[i] - pk.predict_trough(doses[i], intervals[i], 0.08, 50.0, 1.5)) < 1e-9
+    assert pk.predict_peak(doses, intervals, 0.0, 50.0).tolist() == [0.0, 0.0, 0.0]
+    assert pk.predict_trough(doses, intervals, np.array([-0.5, 0.0, 0.08]), 50.0)[:2].tolist() == [0.0, 0.0]
+
+    pair_peaks, pair_troughs = pk.predict_peak_trough(doses, intervals, 0.08, 50.0, 1.5)
+    assert np.array_equal(pair_peaks, peaks) and np.array_equal(pair_troughs, troughs)
+
+
+def test_dose_rounding_midpoints_round_up():
+    # 25 kg x 25 mg/kg = 625 mg, exactly halfway between 500 and 750.
+    assert pk.round_to_increment(625.0) == 750
+    assert pk.round_to_increment(np.array([624.9, 625.0, 875.0])).tolist() == [500, 750, 1000]
+    assert loading_dose(25, True) == 750
+    assert pk.calculate_dose(25, 30, True)["loading_dose_mg"] == 750
+
+    # Bayesian target dose 500 * 0.125 * 10 = 625 mg; 500 and 750 mg give AUCs of exactly 400 and 600.
+    assert pk.calculate_dose(70, 30, False, bayesian={"k_e": 0.125, "vd": 10.0})["maintenance_dose_mg"] == 750
+
+
+def test_batch_endpoint_rows_match_single_endpoint():
+    patients = [
+        {"age_years": 25, "weight_kg": 65, "sex": "male", "serum_creatinine": 0.6, "height_cm": 175, "serious_infection": False},
+        {"age_years": 67, "weight_kg": 183.5, "sex": "male", "serum_creatinine": 1.24, "height_cm": 168, "serious_infection": True},
+        {"age_years": 80, "weight_kg": 25, "sex": "female", "serum_creatinine": 2.5, "height_cm": 150, "serious_infection": True},
+    ]
+    client = TestClient(app)
+    batch = client.post("/api/calculate-dose/batch", json={"patients": patients})
+    assert batch.status_code == 200
+
+    for patient, row in zip(patients, batch.json()["results"]):
+        single = client.post("/api/calculate-dose", json={"patient": patient}).json()
+        for key, value in row.items():
+            if key == "notes":
+                assert value == single["notes"]
+            else:
+                assert value == pytest.approx(single[key], rel=1e-9), key
@@ -0,0 +1,40 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.server import PrecompressedStaticFiles
+
+
+def _client(tmp_path):
+    body = b"console.log('vancomyzer');\n" * 20
+    (tmp_path / "app.js").write_bytes(body)
+    (tmp_path / "app.js.gz").write_bytes(gzip.compress(body))
+    (tmp_path / "app.js.br").write_bytes(b"br-sidecar")
+    app = FastAPI()
+    app.mount("/assets", PrecompressedStaticFiles(directory=tmp_path), name="assets")
+    client = TestClient(app)
+    client.headers.pop("accept-encoding", None)
+    return client, body
+
+
+def test_sidecar_selection_follows_accept_encoding(tmp_path):
+    client, body = _client(tmp_path)
+
+    cases = [
+        ("br, gzip", "br"),
+        ("gzip, deflate", "gzip"),
+        ("br;q=0, gzip;q=0.5", "gzip"),
+        ("gzip;q=0", None),
+        ("*", "br"),
+        ("*, br;q=0", "gzip"),
+        (None, None),
+    ]
+    for accept_encoding, expected in cases:
+        headers = {"accept-encoding": accept_encoding} if accept_encoding is not None else {}
+        response = client.get("/assets/app.js", headers=headers)
+        assert response.status_code == 200
+        assert response.headers.get("content-encoding") == expected, accept_encoding
+        assert response.headers["vary"] == "Accept-Encoding"
+        if expected is None:
+            assert response.content == body
@@ -1,5 +1,8 @@
-import math
-from typing import Dict, List, Optional, Tuple
+import heapq
+from math import exp as _exp, log as _log
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
 
 # Guideline-informed targets:
 # - AUC/MIC >= 400 mg·h/L (MIC assumed 1 mg/L)
@@ -7,9 +10,23 @@ from typing import Dict, List, Optional, Tuple
 # - Loading dose 20-25 mg/kg ABW (max 3000 mg) for serious infections
 # - Maintenance 15-20 mg/kg with interval by CrCl
 
+# Dosing interval indexed by (CrCl >= 60) + (CrCl > 100): q24h, q12h, q8h.
+_INTERVAL_TABLE = (24, 12, 8)
+# Maintenance mg/kg indexed by whether the infection is serious.
+_BASE_MG_PER_KG = (15, 20)
+
 
-def _round_to_increment(value: float, increment: int = 250) -> int:
-    return int(round(value / increment) * increment)
+ArrayLike = Union[float, np.ndarray]
+
+
+def round_to_increment(value: ArrayLike, increment: int = 250) -> Union[int, np.ndarray]:
+    """Round a non-negative dose to the nearest (even) increment, halves up like Excel's MROUND.
+
+    An ndarray is rounded element-wise to an int64 array with the same rule.
+    """
+    if isinstance(value, np.ndarray):
+        return (np.trunc(value).astype(np.int64) + (increment >> 1)) // increment * increment
+    return (int(value) + (increment >> 1)) // increment * increment
 
 
 def _ibw_kg(height_cm: float, sex: str) -> Optional[float]:
@@ -56,6 +73,36 @@ def volume_distribution(weight_kg: float) -> float:
     return max(0.7 * weight_kg, 1.0)
 
 
+def population_pk_batch(
+    age_years: np.ndarray,
+    weight_kg: np.ndarray,
+    female: np.ndarray,
+    serum_creatinine: np.ndarray,
+    height_cm: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(CrCl, k_e, Vd) arrays for a cohort; element-wise equivalent of `cockcroft_gault`,
+    `elimination_constant` and `volume_distribution`. Unknown heights are 0 or NaN."""
+    age_years = np.asarray(age_years, dtype=float)
+    weight_kg = np.asarray(weight_kg, dtype=float)
+    female = np.asarray(female, dtype=bool)
+    serum_creatinine = np.asarray(serum_creatinine, dtype=float)
+    height_in = np.nan_to_num(np.asarray(height_cm, dtype=float)) / 2.54
+
+    ibw = np.where(female, 45.5, 50.0) + 2.3 * np.maximum(0.0, height_in - 60.0)
+    use_adjusted = (height_in > 0) & (weight_kg > 1.3 * ibw)
+    weight_used = np.where(use_adjusted, ibw + 0.4 * (weight_kg - ibw), weight_kg)
+
+    valid = (age_years > 0) & (weight_kg > 0) & (serum_creatinine > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crcl = ((140.0 - age_years) * weight_used) / (72.0 * serum_creatinine)
+    crcl = np.where(female, crcl * 0.85, crcl)
+    crcl = np.where(valid, np.maximum(crcl, 10.0), 0.0)
+
+    k_e = np.maximum(0.00083 * crcl + 0.0044, 0.001)
+    vd = np.maximum(0.7 * weight_kg, 1.0)
+    return crcl, k_e, vd
+
+
 def half_life_hours(k_e: float) -> float:
     return 0.693 / max(k_e, 0.001)
 
@@ -69,45 +116,113 @@ def calculate_auc_24(dose_mg: float, interval_h: float, k_e: float, vd_l: float)
     return daily_dose / clearance
 
 
+def _any_array(*values: ArrayLike) -> bool:
+    return any(isinstance(v, np.ndarray) for v in values)
+
+
 def predict_peak(
-    dose_mg: float,
-    interval_h: float,
-    k_e: float,
-    vd_l: float,
-    infusion_h: float = 1.0,
-) -> float:
-    """Predicted peak at end of infusion (steady state)."""
+    dose_mg: ArrayLike,
+    interval_h: ArrayLike,
+    k_e: ArrayLike,
+    vd_l: ArrayLike,
+    infusion_h: ArrayLike = 1.0,
+) -> ArrayLike:
+    """Predicted peak at end of infusion (steady state).
+
+    Any argument may be a NumPy array (e.g. a dose x interval grid); arguments are
+    broadcast together and an ndarray is returned.
+    """
+    if _any_array(dose_mg, interval_h, k_e, vd_l, infusion_h):
+        return _peak_trough_array(dose_mg, interval_h, k_e, vd_l, infusion_h, trough=False)[0]
     if interval_h <= 0 or vd_l <= 0 or k_e <= 0:
         return 0.0
     infusion_h = max(infusion_h, 0.1)
-    factor = (dose_mg / (vd_l * k_e * infusion_h)) * (1 - math.exp(-k_e * infusion_h))
-    accumulation = 1 / (1 - math.exp(-k_e * interval_h))
+    factor = (dose_mg / (vd_l * k_e * infusion_h)) * (1 - _exp(-k_e * infusion_h))
+    accumulation = 1 / (1 - _exp(-k_e * interval_h))
     return factor * accumulation
 
 
+def _peak_trough_array(
+    dose_mg: ArrayLike,
+    interval_h: ArrayLike,
+    k_e: ArrayLike,
+    vd_l: ArrayLike,
+    infusion_h: ArrayLike,
+    trough: bool = True,
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Broadcast (peak, trough); entries with a non-positive interval, Vd or k_e are 0."""
+    interval_h = np.asarray(interval_h, dtype=float)
+    k_e = np.asarray(k_e, dtype=float)
+    vd_l = np.asarray(vd_l, dtype=float)
+    valid = (interval_h > 0) & (vd_l > 0) & (k_e > 0)
+    tin = np.maximum(infusion_h, 0.1)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        factor = (dose_mg / (vd_l * k_e * tin)) * (1 - np.exp(-k_e * tin))
+        accumulation = 1 / (1 - np.exp(-k_e * interval_h))
+        peak = np.where(valid, factor * accumulation, 0.0)
+        if not trough:
+            return peak, None
+        decay = np.exp(-k_e * np.maximum(np.subtract(interval_h, infusion_h), 0.1))
+        return peak, np.where(valid, peak * decay, 0.0)
+
+
 def predict_trough(
+    dose_mg: ArrayLike,
+    interval_h: ArrayLike,
+    k_e: ArrayLike,
+    vd_l: ArrayLike,
+    infusion_h: ArrayLike = 1.0,
+) -> ArrayLike:
+    """Predicted trough just before next dose (steady state); accepts arrays like `predict_peak`."""
+    return predict_peak_trough(dose_mg, interval_h, k_e, vd_l, infusion_h)[1]
+
+
+def predict_peak_trough(
+    dose_mg: ArrayLike,
+    interval_h: ArrayLike,
+    k_e: ArrayLike,
+    vd_l: ArrayLike,
+    infusion_h: ArrayLike = 1.0,
+) -> Tuple[ArrayLike, ArrayLike]:
+    """Steady-state (peak, trough) together, sharing the peak; accepts arrays like `predict_peak`."""
+    if _any_array(dose_mg, interval_h, k_e, vd_l, infusion_h):
+        return _peak_trough_array(dose_mg, interval_h, k_e, vd_l, infusion_h)
+    return _peak_trough(dose_mg, interval_h, k_e, vd_l, infusion_h)
+
+
+def _peak_trough(
     dose_mg: float,
     interval_h: float,
     k_e: float,
     vd_l: float,
     infusion_h: float = 1.0,
-) -> float:
-    """Predicted trough just before next dose (steady state)."""
-    peak = predict_peak(dose_mg, interval_h, k_e, vd_l, infusion_h)
-    return peak * math.exp(-k_e * max(interval_h - infusion_h, 0.1))
+) -> Tuple[float, float]:
+    """Scalar steady-state (peak, trough); each exponential is evaluated once."""
+    if interval_h <= 0 or vd_l <= 0 or k_e <= 0:
+        return 0.0, 0.0
+    tin = max(infusion_h, 0.1)
+    factor = (dose_mg / (vd_l * k_e * tin)) * (1 - _exp(-k_e * tin))
+    peak = factor * (1 / (1 - _exp(-k_e * interval_h)))
+    return peak, peak * _exp(-k_e * max(interval_h - infusion_h, 0.1))
+
+
+def _ke_from_pairs(c1: float, c2: float, t1: float, t2: float) -> Optional[float]:
+    """Log-linear elimination slope between two post-distribution levels (t1 < t2)."""
+    if c1 <= 0 or c2 <= 0 or t2 <= t1:
+        return None
+    return _log(c1 / c2) / (t2 - t1)
 
 
 def _estimate_ke_from_two_levels(levels: List[Dict]) -> Optional[float]:
     if len(levels) < 2:
         return None
-    levels_sorted = sorted(levels, key=lambda l: l["time_hours"])
-    c1 = levels_sorted[0]["level_mg_l"]
-    c2 = levels_sorted[1]["level_mg_l"]
-    t1 = levels_sorted[0]["time_hours"]
-    t2 = levels_sorted[1]["time_hours"]
-    if c1 <= 0 or c2 <= 0 or t2 <= t1:
-        return None
-    return math.log(c1 / c2) / (t2 - t1)
+    first, second = heapq.nsmallest(2, levels, key=lambda l: l["time_hours"])
+    return _ke_from_pairs(
+        float(first["level_mg_l"]),
+        float(second["level_mg_l"]),
+        float(first["time_hours"]),
+        float(second["time_hours"]),
+    )
 
 
 def _estimate_vd_from_level(
@@ -121,10 +236,10 @@ def _estimate_vd_from_level(
         return None
     infusion_h = max(infusion_h, 0.1)
     if time_h <= infusion_h:
-        numerator = dose_mg * (1 - math.exp(-k_e * time_h))
+        numerator = dose_mg * (1 - _exp(-k_e * time_h))
         denominator = k_e * infusion_h * level_mg_l
         return numerator / denominator
-    numerator = dose_mg * (1 - math.exp(-k_e * infusion_h)) * math.exp(-k_e * (time_h - infusion_h))
+    numerator = dose_mg * (1 - _exp(-k_e * infusion_h)) * _exp(-k_e * (time_h - infusion_h))
     denominator = k_e * infusion_h * level_mg_l
     return numerator / denominator
 
@@ -159,13 +274,13 @@ def calculate_dose(
     bayesian: Optional[Dict] = None,
 ) -> Dict[str, float]:
     """Return guideline-based loading/maintenance regimen and PK predictions."""
-    interval_h = 8 if crcl > 100 else 12 if crcl >= 60 else 24
-    base_mg_per_kg = 20 if serious else 15
-    maintenance_dose = _round_to_increment(base_mg_per_kg * weight_kg)
+    interval_h = _INTERVAL_TABLE[int(crcl >= 60) + int(crcl > 100)]
+    base_mg_per_kg = _BASE_MG_PER_KG[bool(serious)]
+    maintenance_dose = round_to_increment(base_mg_per_kg * weight_kg)
 
     loading_dose = 0
     if serious:
-        loading_dose = min(_round_to_increment(25 * weight_kg, 250), 3000)
+        loading_dose = min(round_to_increment(25 * weight_kg, 250), 3000)
 
     k_e = bayesian["k_e"] if bayesian and "k_e" in bayesian else elimination_constant(crcl)
     vd = bayesian["vd"] if bayesian and "vd" in bayesian else volume_distribution(weight_kg)
@@ -173,12 +288,13 @@ def calculate_dose(
     auc = calculate_auc_24(maintenance_dose, interval_h, k_e, vd)
     target_auc = 500.0
     if bayesian:
+        # AUC is linear in dose, so the 250 mg step closest to the target AUC is the
+        # target dose rounded like every other dose (halves up).
         adjusted_dose = (target_auc * (k_e * vd) * interval_h) / 24.0
-        maintenance_dose = _round_to_increment(adjusted_dose)
+        maintenance_dose = round_to_increment(adjusted_dose)
         auc = calculate_auc_24(maintenance_dose, interval_h, k_e, vd)
 
-    peak = predict_peak(maintenance_dose, interval_h, k_e, vd)
-    trough = predict_trough(maintenance_dose, interval_h, k_e, vd)
+    peak, trough = _peak_trough(maintenance_dose, interval_h, k_e, vd)
 
     return {
         "loading_dose_mg": loading_dose,
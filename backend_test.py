@@ -7,75 +7,182 @@ Comprehensive testing for the Vancomyzer web application backend API endpoints.
 Tests all core functionality including dosing calculations, health checks, and data validation.
 """
 
-import requests
-import json
+import argparse
+import asyncio
+import httpx
+import orjson
 import sys
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, Callable, NamedTuple, Sequence
 import time
 
+def _json(response: httpx.Response) -> Any:
+    """Decode a response body with orjson"""
+    return orjson.loads(response.content)
+
+# Response fields each endpoint must return
+_HEALTH_FIELDS = ('status', 'timestamp')
+_DOSING_FIELDS = (
+    'recommended_dose_mg', 'interval_hours', 'daily_dose_mg',
+    'predicted_auc_24', 'predicted_trough', 'predicted_peak',
+    'clearance_l_per_h', 'volume_distribution_l', 'half_life_hours',
+    'safety_warnings', 'monitoring_recommendations', 'pk_curve_data'
+)
+_PK_SIMULATION_FIELDS = ('pk_curve', 'predicted_auc', 'predicted_trough', 'predicted_peak', 'pk_parameters')
+_BAYESIAN_FIELDS = (
+    'individual_clearance', 'individual_volume', 'clearance_ci_lower', 'clearance_ci_upper',
+    'model_fit_r_squared', 'convergence_achieved', 'individual_pk_curve', 'population_pk_curve'
+)
+
+# Invalid patient data the dosing endpoint must reject
+_INVALID_PATIENT = {
+    "population_type": "adult",
+    "age_years": -5,  # Invalid age
+    "gender": "invalid_gender",  # Invalid gender
+    "weight_kg": -10,  # Invalid weight
+    "serum_creatinine": 0,  # Invalid creatinine
+    "indication": "pneumonia",
+    "severity": "moderate"
+}
+
+# Patient scenarios posted to the dosing endpoint
+_SCENARIOS = (
+    {
+        "name": "Adult Male",
+        "data": {
+            "population_type": "adult",
+            "age_years": 35,
+            "gender": "male",
+            "weight_kg": 80.0,
+            "serum_creatinine": 1.0,
+            "indication": "bacteremia",
+            "severity": "severe"
+        }
+    },
+    {
+        "name": "Adult Female",
+        "data": {
+            "population_type": "adult",
+            "age_years": 28,
+            "gender": "female",
+            "weight_kg": 65.0,
+            "serum_creatinine": 0.8,
+            "indication": "skin_soft_tissue",
+            "severity": "mild"
+        }
+    },
+    {
+        "name": "Pediatric Patient",
+        "data": {
+            "population_type": "pediatric",
+            "age_years": 8,
+            "gender": "male",
+            "weight_kg": 25.0,
+            "serum_creatinine": 0.5,
+            "indication": "pneumonia",
+            "severity": "moderate"
+        }
+    }
+)
+
+class _Test(NamedTuple):
+    """One backend test: its result key, log name, banner, tester method and scheduling"""
+    key: str
+    name: str
+    banner: str
+    method: str
+    concurrent: bool
+    skipped_by_smoke: bool
+
+# Endpoint tests are independent of each other and run concurrently;
+# validation and scenarios stay sequential after them
+_TESTS = (
+    _Test('health_check', "Health Check", "Health Check Endpoint", 'test_health_check', True, False),
+    _Test('calculate_dosing', "Calculate Dosing", "Calculate Dosing Endpoint", 'test_calculate_dosing', True, False),
+    _Test('pk_simulation', "PK Simulation", "PK Simulation Endpoint", 'test_pk_simulation', True, False),
+    _Test('bayesian_optimization', "Bayesian Optimization", "Bayesian Optimization Endpoint", 'test_bayesian_optimization', True, False),
+    _Test('data_validation', "Data Validation", "Data Validation", 'test_data_validation', False, False),
+    _Test('error_handling', "Patient Scenarios", "Different Patient Scenarios", 'test_different_patient_scenarios', False, True),
+    _Test('websocket_test', "WebSocket Connectivity", "WebSocket Connectivity", 'test_websocket_connectivity', False, False),
+)
+
+# (result key, summary heading) in report order
+_SECTIONS = tuple((test.key, test.key.replace('_', ' ').title()) for test in _TESTS)
+
 class VancomyzerBackendTester:
-    def __init__(self):
+    def __init__(self, smoke: bool = False, full: bool = False, quiet: bool = False):
         # Use localhost since we're testing internally
         self.base_url = "http://localhost:8001"
         self.api_url = f"{self.base_url}/api"
-        self.test_results = {
-            'health_check': {'passed': False, 'details': ''},
-            'calculate_dosing': {'passed': False, 'details': ''},
-            'bayesian_optimization': {'passed': False, 'details': ''},
-            'pk_simulation': {'passed': False, 'details': ''},
-            'websocket_test': {'passed': False, 'details': ''},
-            'error_handling': {'passed': False, 'details': ''},
-            'data_validation': {'passed': False, 'details': ''}
-        }
-        self.session = requests.Session()
-        self.session.timeout = 30
+        self.ws_url = self.base_url.replace("http", "ws", 1) + "/ws/realtime-calc"
+        # --smoke skips the patient scenario matrix; --full adds a real WebSocket round-trip
+        self.smoke = smoke
+        self.full = full
+        # --quiet only wants the exit code: no banners, per-test logs or detailed summary
+        self.quiet = quiet
+        self.tests = [test for test in _TESTS if not (smoke and test.skipped_by_smoke)]
+        self.test_results = {test.key: {'passed': False, 'details': ''} for test in self.tests}
+        # One pooled keep-alive client shared by every test, including concurrent ones
+        self.client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=8, max_keepalive_connections=8),
+        )
+
+    async def warm_up(self):
+        """Open a pooled connection before the timed tests"""
+        try:
+            await self.client.get(f"{self.base_url}/health", timeout=5.0)
+        except httpx.HTTPError:
+            pass
         
     def log_test(self, test_name: str, status: str, details: str):
         """Log test results"""
-        timestamp = datetime.now().strftime('%H:%M:%S')
+        if self.quiet:
+            return
+        now = time.localtime()
+        timestamp = f"{now.tm_hour:02d}:{now.tm_min:02d}:{now.tm_sec:02d}"
         print(f"[{timestamp}] {test_name}: {status}")
         if details:
             print(f"    Details: {details}")
         
-    def test_health_check(self) -> bool:
-        """Test the health check endpoint"""
-        print("\n🔍 Testing Health Check Endpoint...")
-        
+    def _record(self, key: str, label: str, passed: bool, details: str) -> bool:
+        """Store a test outcome under `key` and log it"""
+        self.test_results[key]['passed'] = passed
+        self.test_results[key]['details'] = details
+        self.log_test(label, "✅ PASSED" if passed else "❌ FAILED", details)
+        return passed
+    
+    async def _run_endpoint_test(self, key: str, label: str, method: str, url: str,
+                                 required_fields: Sequence[str], validate: Callable[[Dict[str, Any]], bool],
+                                 describe: Callable[[Dict[str, Any]], str], invalid_details: str,
+                                 **request_kwargs) -> bool:
+        """Request `url` and check the status code, required fields and `validate(data)`"""
         try:
-            response = self.session.get(f"{self.api_url}/health")
+            response = await self.client.request(method, url, **request_kwargs)
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Validate response structure
-                if 'status' in data and 'timestamp' in data:
-                    if data['status'] == 'healthy':
-                        self.test_results['health_check']['passed'] = True
-                        self.test_results['health_check']['details'] = f"✅ Health check passed. Status: {data['status']}, Timestamp: {data['timestamp']}"
-                        self.log_test("Health Check", "✅ PASSED", self.test_results['health_check']['details'])
-                        return True
-                    else:
-                        details = f"❌ Unexpected status: {data['status']}"
-                        self.test_results['health_check']['details'] = details
-                        self.log_test("Health Check", "❌ FAILED", details)
-                        return False
-                else:
-                    details = f"❌ Missing required fields in response: {data}"
-                    self.test_results['health_check']['details'] = details
-                    self.log_test("Health Check", "❌ FAILED", details)
-                    return False
-            else:
-                details = f"❌ HTTP {response.status_code}: {response.text}"
-                self.test_results['health_check']['details'] = details
-                self.log_test("Health Check", "❌ FAILED", details)
-                return False
+            if response.status_code != 200:
+                return self._record(key, label, False, f"❌ HTTP {response.status_code}: {response.text}")
+            
+            data = _json(response)
+            missing_fields = [field for field in required_fields if field not in data]
+            if missing_fields:
+                return self._record(key, label, False, f"❌ Missing required fields: {missing_fields}")
+            if not validate(data):
+                return self._record(key, label, False, invalid_details)
+            return self._record(key, label, True, describe(data))
                 
         except Exception as e:
-            details = f"❌ Exception: {str(e)}"
-            self.test_results['health_check']['details'] = details
-            self.log_test("Health Check", "❌ FAILED", details)
-            return False
+            return self._record(key, label, False, f"❌ Exception: {str(e)}")
+    
+    async def test_health_check(self) -> bool:
+        """Test the health check endpoint"""
+        return await self._run_endpoint_test(
+            'health_check', "Health Check", "GET", f"{self.api_url}/health",
+            required_fields=_HEALTH_FIELDS,
+            validate=lambda data: data['status'] == 'healthy',
+            describe=lambda data: f"✅ Health check passed. Status: {data['status']}, Timestamp: {data['timestamp']}",
+            invalid_details="❌ Unexpected status in health response"
+        )
     
     def get_sample_patient_data(self) -> Dict[str, Any]:
         """Get sample patient data for testing"""
@@ -94,272 +201,103 @@ class VancomyzerBackendTester:
             "crcl_method": "cockcroft_gault"
         }
     
-    def test_calculate_dosing(self) -> bool:
+    async def test_calculate_dosing(self) -> bool:
         """Test the calculate dosing endpoint"""
-        print("\n🔍 Testing Calculate Dosing Endpoint...")
-        
-        try:
-            patient_data = self.get_sample_patient_data()
-            response = self.session.post(f"{self.api_url}/calculate-dosing", json=patient_data)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Validate required fields in response
-                required_fields = [
-                    'recommended_dose_mg', 'interval_hours', 'daily_dose_mg',
-                    'predicted_auc_24', 'predicted_trough', 'predicted_peak',
-                    'clearance_l_per_h', 'volume_distribution_l', 'half_life_hours',
-                    'safety_warnings', 'monitoring_recommendations', 'pk_curve_data'
-                ]
-                
-                missing_fields = [field for field in required_fields if field not in data]
-                
-                if not missing_fields:
-                    # Validate data types and ranges
-                    if (isinstance(data['recommended_dose_mg'], (int, float)) and data['recommended_dose_mg'] > 0 and
-                        isinstance(data['interval_hours'], (int, float)) and data['interval_hours'] > 0 and
-                        isinstance(data['predicted_auc_24'], (int, float)) and data['predicted_auc_24'] > 0 and
-                        isinstance(data['safety_warnings'], list) and
-                        isinstance(data['monitoring_recommendations'], list) and
-                        isinstance(data['pk_curve_data'], list)):
-                        
-                        self.test_results['calculate_dosing']['passed'] = True
-                        details = f"✅ Dosing calculation successful. Dose: {data['recommended_dose_mg']}mg q{data['interval_hours']}h, AUC: {data['predicted_auc_24']:.1f}"
-                        self.test_results['calculate_dosing']['details'] = details
-                        self.log_test("Calculate Dosing", "✅ PASSED", details)
-                        return True
-                    else:
-                        details = f"❌ Invalid data types or values in response"
-                        self.test_results['calculate_dosing']['details'] = details
-                        self.log_test("Calculate Dosing", "❌ FAILED", details)
-                        return False
-                else:
-                    details = f"❌ Missing required fields: {missing_fields}"
-                    self.test_results['calculate_dosing']['details'] = details
-                    self.log_test("Calculate Dosing", "❌ FAILED", details)
-                    return False
-            else:
-                details = f"❌ HTTP {response.status_code}: {response.text}"
-                self.test_results['calculate_dosing']['details'] = details
-                self.log_test("Calculate Dosing", "❌ FAILED", details)
-                return False
-                
-        except Exception as e:
-            details = f"❌ Exception: {str(e)}"
-            self.test_results['calculate_dosing']['details'] = details
-            self.log_test("Calculate Dosing", "❌ FAILED", details)
-            return False
+        return await self._run_endpoint_test(
+            'calculate_dosing', "Calculate Dosing", "POST", f"{self.api_url}/calculate-dosing",
+            required_fields=_DOSING_FIELDS,
+            validate=lambda data: (
+                isinstance(data['recommended_dose_mg'], (int, float)) and data['recommended_dose_mg'] > 0 and
+                isinstance(data['interval_hours'], (int, float)) and data['interval_hours'] > 0 and
+                isinstance(data['predicted_auc_24'], (int, float)) and data['predicted_auc_24'] > 0 and
+                isinstance(data['safety_warnings'], list) and
+                isinstance(data['monitoring_recommendations'], list) and
+                isinstance(data['pk_curve_data'], list)
+            ),
+            describe=lambda data: f"✅ Dosing calculation successful. Dose: {data['recommended_dose_mg']}mg q{data['interval_hours']}h, AUC: {data['predicted_auc_24']:.1f}",
+            invalid_details="❌ Invalid data types or values in response",
+            json=self.get_sample_patient_data()
+        )
     
-    def test_pk_simulation(self) -> bool:
+    async def test_pk_simulation(self) -> bool:
         """Test the PK simulation endpoint"""
-        print("\n🔍 Testing PK Simulation Endpoint...")
-        
-        try:
-            patient_data = self.get_sample_patient_data()
-            # Try with query parameters as the error suggests
-            params = {"dose": 1000.0, "interval": 12.0}
-            
-            response = self.session.post(f"{self.api_url}/pk-simulation", json=patient_data, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Validate required fields
-                required_fields = ['pk_curve', 'predicted_auc', 'predicted_trough', 'predicted_peak', 'pk_parameters']
-                missing_fields = [field for field in required_fields if field not in data]
-                
-                if not missing_fields:
-                    # Validate pk_curve data structure
-                    if (isinstance(data['pk_curve'], list) and len(data['pk_curve']) > 0 and
-                        'time' in data['pk_curve'][0] and 'concentration' in data['pk_curve'][0]):
-                        
-                        self.test_results['pk_simulation']['passed'] = True
-                        details = f"✅ PK simulation successful. Curve points: {len(data['pk_curve'])}, AUC: {data['predicted_auc']:.1f}"
-                        self.test_results['pk_simulation']['details'] = details
-                        self.log_test("PK Simulation", "✅ PASSED", details)
-                        return True
-                    else:
-                        details = f"❌ Invalid pk_curve data structure"
-                        self.test_results['pk_simulation']['details'] = details
-                        self.log_test("PK Simulation", "❌ FAILED", details)
-                        return False
-                else:
-                    details = f"❌ Missing required fields: {missing_fields}"
-                    self.test_results['pk_simulation']['details'] = details
-                    self.log_test("PK Simulation", "❌ FAILED", details)
-                    return False
-            else:
-                details = f"❌ HTTP {response.status_code}: {response.text}"
-                self.test_results['pk_simulation']['details'] = details
-                self.log_test("PK Simulation", "❌ FAILED", details)
-                return False
-                
-        except Exception as e:
-            details = f"❌ Exception: {str(e)}"
-            self.test_results['pk_simulation']['details'] = details
-            self.log_test("PK Simulation", "❌ FAILED", details)
-            return False
+        return await self._run_endpoint_test(
+            'pk_simulation', "PK Simulation", "POST", f"{self.api_url}/pk-simulation",
+            required_fields=_PK_SIMULATION_FIELDS,
+            validate=lambda data: (
+                isinstance(data['pk_curve'], list) and len(data['pk_curve']) > 0 and
+                'time' in data['pk_curve'][0] and 'concentration' in data['pk_curve'][0]
+            ),
+            describe=lambda data: f"✅ PK simulation successful. Curve points: {len(data['pk_curve'])}, AUC: {data['predicted_auc']:.1f}",
+            invalid_details="❌ Invalid pk_curve data structure",
+            json=self.get_sample_patient_data(),
+            # Dose and interval go as query parameters
+            params={"dose": 1000.0, "interval": 12.0}
+        )
     
-    def test_bayesian_optimization(self) -> bool:
+    async def test_bayesian_optimization(self) -> bool:
         """Test the Bayesian optimization endpoint"""
-        print("\n🔍 Testing Bayesian Optimization Endpoint...")
+        # Sample vancomycin levels for Bayesian optimization
+        levels = [
+            {
+                "concentration": 15.5,
+                "time_after_dose_hours": 12.0,
+                "dose_given_mg": 1000.0,
+                "infusion_duration_hours": 1.0,
+                "level_type": "trough",
+                "draw_time": (datetime.now() - timedelta(hours=12)).isoformat(),
+                "notes": "Steady state trough level"
+            }
+        ]
         
-        try:
-            patient_data = self.get_sample_patient_data()
-            
-            # Sample vancomycin levels for Bayesian optimization
-            levels = [
-                {
-                    "concentration": 15.5,
-                    "time_after_dose_hours": 12.0,
-                    "dose_given_mg": 1000.0,
-                    "infusion_duration_hours": 1.0,
-                    "level_type": "trough",
-                    "draw_time": (datetime.now() - timedelta(hours=12)).isoformat(),
-                    "notes": "Steady state trough level"
-                }
-            ]
-            
+        return await self._run_endpoint_test(
+            'bayesian_optimization', "Bayesian Optimization", "POST", f"{self.api_url}/bayesian-optimization",
+            required_fields=_BAYESIAN_FIELDS,
+            validate=lambda data: (
+                isinstance(data['individual_clearance'], (int, float)) and data['individual_clearance'] > 0 and
+                isinstance(data['individual_volume'], (int, float)) and data['individual_volume'] > 0 and
+                isinstance(data['individual_pk_curve'], list) and len(data['individual_pk_curve']) > 0
+            ),
+            describe=lambda data: f"✅ Bayesian optimization successful. CL: {data['individual_clearance']:.2f} L/h, V: {data['individual_volume']:.1f} L",
+            invalid_details="❌ Invalid parameter values in response",
             # FastAPI expects multiple body parameters in this format
-            bayesian_data = {
-                "patient": patient_data,
-                "levels": levels
-            }
-            
-            response = self.session.post(f"{self.api_url}/bayesian-optimization", json=bayesian_data)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Validate required fields
-                required_fields = [
-                    'individual_clearance', 'individual_volume', 'clearance_ci_lower', 'clearance_ci_upper',
-                    'model_fit_r_squared', 'convergence_achieved', 'individual_pk_curve', 'population_pk_curve'
-                ]
-                missing_fields = [field for field in required_fields if field not in data]
-                
-                if not missing_fields:
-                    if (isinstance(data['individual_clearance'], (int, float)) and data['individual_clearance'] > 0 and
-                        isinstance(data['individual_volume'], (int, float)) and data['individual_volume'] > 0 and
-                        isinstance(data['individual_pk_curve'], list) and len(data['individual_pk_curve']) > 0):
-                        
-                        self.test_results['bayesian_optimization']['passed'] = True
-                        details = f"✅ Bayesian optimization successful. CL: {data['individual_clearance']:.2f} L/h, V: {data['individual_volume']:.1f} L"
-                        self.test_results['bayesian_optimization']['details'] = details
-                        self.log_test("Bayesian Optimization", "✅ PASSED", details)
-                        return True
-                    else:
-                        details = f"❌ Invalid parameter values in response"
-                        self.test_results['bayesian_optimization']['details'] = details
-                        self.log_test("Bayesian Optimization", "❌ FAILED", details)
-                        return False
-                else:
-                    details = f"❌ Missing required fields: {missing_fields}"
-                    self.test_results['bayesian_optimization']['details'] = details
-                    self.log_test("Bayesian Optimization", "❌ FAILED", details)
-                    return False
-            else:
-                details = f"❌ HTTP {response.status_code}: {response.text}"
-                self.test_results['bayesian_optimization']['details'] = details
-                self.log_test("Bayesian Optimization", "❌ FAILED", details)
-                return False
-                
-        except Exception as e:
-            details = f"❌ Exception: {str(e)}"
-            self.test_results['bayesian_optimization']['details'] = details
-            self.log_test("Bayesian Optimization", "❌ FAILED", details)
-            return False
+            json={"patient": self.get_sample_patient_data(), "levels": levels}
+        )
     
-    def test_data_validation(self) -> bool:
+    async def test_data_validation(self) -> bool:
         """Test data validation and error handling"""
-        print("\n🔍 Testing Data Validation...")
-        
         try:
-            # Test with invalid patient data
-            invalid_data = {
-                "population_type": "adult",
-                "age_years": -5,  # Invalid age
-                "gender": "invalid_gender",  # Invalid gender
-                "weight_kg": -10,  # Invalid weight
-                "serum_creatinine": 0,  # Invalid creatinine
-                "indication": "pneumonia",
-                "severity": "moderate"
-            }
-            
-            response = self.session.post(f"{self.api_url}/calculate-dosing", json=invalid_data)
+            response = await self.client.post(f"{self.api_url}/calculate-dosing", json=_INVALID_PATIENT)
             
             # Should return 400 or 422 for validation errors
             if response.status_code in [400, 422]:
-                self.test_results['data_validation']['passed'] = True
                 details = f"✅ Data validation working correctly. Rejected invalid data with HTTP {response.status_code}"
-                self.test_results['data_validation']['details'] = details
-                self.log_test("Data Validation", "✅ PASSED", details)
-                return True
+                return self._record('data_validation', "Data Validation", True, details)
             else:
                 details = f"❌ Expected validation error but got HTTP {response.status_code}"
-                self.test_results['data_validation']['details'] = details
-                self.log_test("Data Validation", "❌ FAILED", details)
-                return False
+                return self._record('data_validation', "Data Validation", False, details)
                 
         except Exception as e:
-            details = f"❌ Exception: {str(e)}"
-            self.test_results['data_validation']['details'] = details
-            self.log_test("Data Validation", "❌ FAILED", details)
-            return False
+            return self._record('data_validation', "Data Validation", False, f"❌ Exception: {str(e)}")
     
-    def test_different_patient_scenarios(self) -> bool:
+    async def test_different_patient_scenarios(self) -> bool:
         """Test different patient scenarios"""
-        print("\n🔍 Testing Different Patient Scenarios...")
-        
-        scenarios = [
-            {
-                "name": "Adult Male",
-                "data": {
-                    "population_type": "adult",
-                    "age_years": 35,
-                    "gender": "male",
-                    "weight_kg": 80.0,
-                    "serum_creatinine": 1.0,
-                    "indication": "bacteremia",
-                    "severity": "severe"
-                }
-            },
-            {
-                "name": "Adult Female",
-                "data": {
-                    "population_type": "adult",
-                    "age_years": 28,
-                    "gender": "female",
-                    "weight_kg": 65.0,
-                    "serum_creatinine": 0.8,
-                    "indication": "skin_soft_tissue",
-                    "severity": "mild"
-                }
-            },
-            {
-                "name": "Pediatric Patient",
-                "data": {
-                    "population_type": "pediatric",
-                    "age_years": 8,
-                    "gender": "male",
-                    "weight_kg": 25.0,
-                    "serum_creatinine": 0.5,
-                    "indication": "pneumonia",
-                    "severity": "moderate"
-                }
-            }
-        ]
-        
         passed_scenarios = 0
-        total_scenarios = len(scenarios)
+        total_scenarios = len(_SCENARIOS)
+        
+        # Dispatch all scenarios at once; results are read back in scenario order
+        responses = await asyncio.gather(
+            *(self.client.post(f"{self.api_url}/calculate-dosing", json=scenario["data"]) for scenario in _SCENARIOS),
+            return_exceptions=True,
+        )
         
-        for scenario in scenarios:
+        for scenario, response in zip(_SCENARIOS, responses):
             try:
-                response = self.session.post(f"{self.api_url}/calculate-dosing", json=scenario["data"])
+                if isinstance(response, Exception):
+                    raise response
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = _json(response)
                     if 'recommended_dose_mg' in data and data['recommended_dose_mg'] > 0:
                         passed_scenarios += 1
                         self.log_test(f"Scenario: {scenario['name']}", "✅ PASSED", 
@@ -375,97 +313,118 @@ class VancomyzerBackendTester:
         success_rate = passed_scenarios / total_scenarios
         if success_rate >= 0.8:  # 80% success rate
             details = f"✅ Patient scenarios test passed. {passed_scenarios}/{total_scenarios} scenarios successful"
-            self.test_results['error_handling']['passed'] = True
-            self.test_results['error_handling']['details'] = details
-            self.log_test("Patient Scenarios", "✅ PASSED", details)
-            return True
+            return self._record('error_handling', "Patient Scenarios", True, details)
         else:
             details = f"❌ Patient scenarios test failed. Only {passed_scenarios}/{total_scenarios} scenarios successful"
-            self.test_results['error_handling']['details'] = details
-            self.log_test("Patient Scenarios", "❌ FAILED", details)
-            return False
+            return self._record('error_handling', "Patient Scenarios", False, details)
     
-    def test_websocket_connectivity(self) -> bool:
+    async def test_websocket_connectivity(self) -> bool:
         """Test WebSocket connectivity (basic check)"""
-        print("\n🔍 Testing WebSocket Connectivity...")
+        if not self.full:
+            # Without --full there is no network round-trip; run with --full to exercise the socket
+            details = "✅ WebSocket endpoint available (basic connectivity check)"
+            return self._record('websocket_test', "WebSocket Test", True, details)
         
         try:
-            # For now, just mark as passed since WebSocket testing requires more complex setup
-            # In a real scenario, we'd use websocket-client library
-            self.test_results['websocket_test']['passed'] = True
-            details = "✅ WebSocket endpoint available (basic connectivity check)"
-            self.test_results['websocket_test']['details'] = details
-            self.log_test("WebSocket Test", "✅ PASSED", details)
-            return True
+            import websockets
             
+            request = {"patient": self.get_sample_patient_data(), "dose": 1000, "interval": 12}
+            async with websockets.connect(self.ws_url) as ws:
+                await ws.send(orjson.dumps(request).decode())
+                data = orjson.loads(await asyncio.wait_for(ws.recv(), 2.0))
+            
+            if 'predicted_auc' in data and 'pk_curve' in data:
+                details = f"✅ WebSocket round-trip successful. AUC: {data['predicted_auc']:.1f}"
+                return self._record('websocket_test', "WebSocket Test", True, details)
+            return self._record('websocket_test', "WebSocket Test", False, f"❌ Unexpected WebSocket response: {data}")
+            
+        except Exception as e:
+            return self._record('websocket_test', "WebSocket Test", False, f"❌ Exception: {str(e)}")
+    
+    async def _run_test(self, test: _Test) -> bool:
+        """Print the test's banner and run it; an unexpected exception counts as a failure"""
+        if not self.quiet:
+            print(f"\n🔍 Testing {test.banner}...")
+        try:
+            return bool(await getattr(self, test.method)())
         except Exception as e:
-            details = f"❌ Exception: {str(e)}"
-            self.test_results['websocket_test']['details'] = details
-            self.log_test("WebSocket Test", "❌ FAILED", details)
+            if not self.quiet:
+                print(f"❌ {test.name} failed with exception: {str(e)}")
             return False
     
-    def run_all_tests(self) -> Dict[str, Any]:
+    async def run_all_tests(self) -> Dict[str, Any]:
         """Run all backend tests"""
-        print("=" * 60)
-        print("🏥 VANCOMYZER BACKEND API TEST SUITE")
-        print("=" * 60)
-        print(f"📅 Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"🌐 Testing URL: {self.base_url}")
-        print()
-        
-        # Run all tests
-        tests = [
-            ("Health Check", self.test_health_check),
-            ("Calculate Dosing", self.test_calculate_dosing),
-            ("PK Simulation", self.test_pk_simulation),
-            ("Bayesian Optimization", self.test_bayesian_optimization),
-            ("Data Validation", self.test_data_validation),
-            ("Patient Scenarios", self.test_different_patient_scenarios),
-            ("WebSocket Connectivity", self.test_websocket_connectivity)
-        ]
+        if not self.quiet:
+            print("=" * 60)
+            print("🏥 VANCOMYZER BACKEND API TEST SUITE")
+            print("=" * 60)
+            print(f"📅 Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            print(f"🌐 Testing URL: {self.base_url}")
+            print()
         
-        passed_tests = 0
-        total_tests = len(tests)
+        concurrent_tests = [test for test in self.tests if test.concurrent]
+        sequential_tests = [test for test in self.tests if not test.concurrent]
         
-        for test_name, test_func in tests:
-            try:
-                if test_func():
-                    passed_tests += 1
-            except Exception as e:
-                print(f"❌ {test_name} failed with exception: {str(e)}")
+        total_tests = len(self.tests)
         
-        # Generate summary
-        print("\n" + "=" * 60)
-        print("📊 TEST SUMMARY")
-        print("=" * 60)
+        try:
+            await self.warm_up()
+            # Running total of passes, accumulated straight from each test's result
+            passed_tests = sum(await asyncio.gather(*(self._run_test(test) for test in concurrent_tests)))
+            for test in sequential_tests:
+                passed_tests += await self._run_test(test)
+        finally:
+            await self.client.aclose()
         
+        # Generate summary; the whole report is assembled and written in one go
         success_rate = passed_tests / total_tests
+        overall = f"Overall: {passed_tests}/{total_tests} tests passed ({success_rate:.1%})"
         
-        for test_name, result in self.test_results.items():
+        if success_rate >= 0.8:
+            status, verdict = 'success', "🎉 Backend API is functioning well!"
+        elif success_rate >= 0.6:
+            status, verdict = 'partial', "⚠️ Backend API has some issues but core functionality works"
+        else:
+            status, verdict = 'failed', "❌ Backend API has significant issues"
+        summary = {'status': status, 'passed': passed_tests, 'total': total_tests, 'details': self.test_results}
+        
+        if self.quiet:
+            print(overall)
+            return summary
+        
+        results = self.test_results
+        lines = ["", "=" * 60, "📊 TEST SUMMARY", "=" * 60]
+        for key, title in _SECTIONS:
+            result = results.get(key)
+            if result is None:  # not run (--smoke)
+                continue
             status = "✅ PASSED" if result['passed'] else "❌ FAILED"
-            print(f"{test_name.replace('_', ' ').title()}: {status}")
+            lines.append(f"{title}: {status}")
             if result['details']:
-                print(f"  {result['details']}")
+                lines.append(f"  {result['details']}")
         
-        print(f"\nOverall: {passed_tests}/{total_tests} tests passed ({success_rate:.1%})")
+        lines.append("\n" + overall)
+        lines.append(verdict)
         
-        if success_rate >= 0.8:
-            print("🎉 Backend API is functioning well!")
-            return {'status': 'success', 'passed': passed_tests, 'total': total_tests, 'details': self.test_results}
-        elif success_rate >= 0.6:
-            print("⚠️ Backend API has some issues but core functionality works")
-            return {'status': 'partial', 'passed': passed_tests, 'total': total_tests, 'details': self.test_results}
-        else:
-            print("❌ Backend API has significant issues")
-            return {'status': 'failed', 'passed': passed_tests, 'total': total_tests, 'details': self.test_results}
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+        return summary
 
 def main():
     """Main test execution function"""
-    print("Starting Vancomyzer Backend API Tests...")
+    parser = argparse.ArgumentParser(description="Vancomyzer backend API tests")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--smoke", action="store_true", help="Skip the patient scenario matrix")
+    mode.add_argument("--full", action="store_true", help="Also round-trip a calculation over the WebSocket")
+    parser.add_argument("--quiet", action="store_true", help="Only print the overall line; the exit code carries the result")
+    args = parser.parse_args()
+    
+    if not args.quiet:
+        print("Starting Vancomyzer Backend API Tests...")
     
     # Create and run test suite
-    tester = VancomyzerBackendTester()
-    results = tester.run_all_tests()
+    tester = VancomyzerBackendTester(smoke=args.smoke, full=args.full, quiet=args.quiet)
+    results = asyncio.run(tester.run_all_tests())
     
     # Return appropriate exit code
     if results['status'] == 'success':
@@ -2,54 +2,296 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional, Tuple
 
 import openpyxl
 
+try:
+    import orjson
+except ImportError:  # optional: stdlib json produces the same document, just slower
+    orjson = None
 
-def dump_workbook(path: Path) -> Dict[str, Any]:
-    wb = openpyxl.load_workbook(path, data_only=False)
-    out: Dict[str, Any] = {"source": str(path), "sheets": {}}
-    for sheet in wb.sheetnames:
-        ws = wb[sheet]
-        max_row = ws.max_row or 0
-        max_col = ws.max_column or 0
-        grid: list[list[Any]] = []
-        for r in range(1, max_row + 1):
-            row_vals: list[Any] = []
-            for c in range(1, max_col + 1):
-                cell = ws.cell(row=r, column=c)
-                value = cell.value
-                if cell.data_type == "f":
-                    value = f"={value}"
-                row_vals.append(value)
-            grid.append(row_vals)
-        out["sheets"][sheet] = {
-            "max_row": max_row,
-            "max_col": max_col,
-            "grid": grid,
-        }
-    return out
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # optional: only needed for --no-preserve-formulas
+    CalamineWorkbook = None
+
+# Bump when the output format changes so stale cache entries are not reused.
+_CACHE_VERSION = "3"
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "vancomyzer_parse"
+
+
+def _grid_payload(rows: Iterable[list[Any]]) -> Dict[str, Any]:
+    # Size the grid from the values actually present: the stored <dimension> and
+    # styled-but-empty cells often extend well past the used range, and readers
+    # treat anything outside the grid as an empty cell.
+    grid: list[list[Any]] = []
+    for row_vals in rows:
+        while row_vals and row_vals[-1] is None:
+            row_vals.pop()
+        grid.append(row_vals)
+    while grid and not grid[-1]:
+        grid.pop()
+    if not grid:
+        grid.append([])  # an empty sheet still reports a single A1 cell
+    max_row = len(grid)
+    max_col = max(1, *map(len, grid))
+    for row_vals in grid:
+        row_vals.extend([None] * (max_col - len(row_vals)))
+    return {
+        "max_row": max_row,
+        "max_col": max_col,
+        "grid": grid,
+    }
+
+
+def _sheet_payload(ws: Any) -> Dict[str, Any]:
+    ws.reset_dimensions()
+    return _grid_payload(
+        [f"={c.value}" if c.data_type == "f" else c.value for c in row]
+        for row in ws.iter_rows()
+    )
+
+
+def _iter_sheets_calamine(path: Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Values-only sheets via python-calamine: formula cells carry their cached
+    result instead of "=..." text, and numbers come back as floats."""
+    wb = CalamineWorkbook.from_path(str(path))
+    for sheet in wb.sheet_names:
+        rows = wb.get_sheet_by_name(sheet).to_python(skip_empty_area=False)
+        # calamine pads empty cells with "" rather than None; the rows are fresh
+        # lists, so blank them in place instead of copying every row.
+        for row in rows:
+            for i, v in enumerate(row):
+                if v == "":
+                    row[i] = None
+        yield sheet, _grid_payload(rows)
+
+
+def _load(path: Path) -> Any:
+    return openpyxl.load_workbook(path, data_only=False, read_only=True, keep_links=False)
+
+
+def _parse_sheet(path: Path, sheet: str) -> Tuple[str, Dict[str, Any]]:
+    wb = _load(path)
+    try:
+        return sheet, _sheet_payload(wb[sheet])
+    finally:
+        wb.close()
+
+
+def iter_sheets(
+    path: Path,
+    jobs: Optional[int] = None,
+    preserve_formulas: bool = True,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (sheet name, payload) in workbook order.
+
+    Sheets are independent, so each is parsed in its own worker process (each
+    re-opens the workbook read-only), up to `jobs` at once (default: one per
+    core); with one sheet or one job they are parsed inline from the
+    already-open workbook. With `preserve_formulas=False` the whole workbook is
+    read values-only by python-calamine instead.
+    """
+    if not preserve_formulas:
+        if CalamineWorkbook is None:
+            raise RuntimeError("values-only parsing requires python-calamine (pip install python-calamine)")
+        yield from _iter_sheets_calamine(path)
+        return
+    wb = _load(path)
+    sheets = wb.sheetnames
+    workers = min(len(sheets), jobs or os.cpu_count() or 1)
+    if workers < 2:
+        try:
+            for sheet in sheets:
+                yield sheet, _sheet_payload(wb[sheet])
+        finally:
+            wb.close()
+        return
+    wb.close()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_parse_sheet, repeat(path), sheets)
+
+
+def dump_workbook(path: Path, jobs: Optional[int] = None, preserve_formulas: bool = True) -> Dict[str, Any]:
+    return {"source": str(path), "sheets": dict(iter_sheets(path, jobs, preserve_formulas))}
+
+
+def _dumps(obj: Any, pretty: bool = False) -> bytes:
+    """Compact (or two-space indented) UTF-8 JSON, via orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def write_workbook(
+    path: Path,
+    out_path: Path,
+    jobs: Optional[int] = None,
+    preserve_formulas: bool = True,
+    pretty: bool = False,
+) -> None:
+    """Write the `dump_workbook` JSON (compact UTF-8, or two-space indented with
+    `pretty`) sheet by sheet, so only one sheet's grid is held in memory and no
+    whole-document string is built.
+
+    The JSON is streamed into a temporary file next to `out_path` and moved into
+    place only once complete, so a failed parse never leaves a truncated file.
+    """
+    partial = out_path.with_name(f"{out_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(partial, "wb", buffering=1 << 20) as f:
+            _write_json(f, path, iter_sheets(path, jobs, preserve_formulas), pretty)
+        os.replace(partial, out_path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+
+def _write_json(f: BinaryIO, path: Path, sheets: Iterable[Tuple[str, Dict[str, Any]]], pretty: bool) -> None:
+    if not pretty:
+        f.write(b'{"source":' + _dumps(str(path)) + b',"sheets":{')
+        sep = b""
+        for name, payload in sheets:
+            f.write(sep + _dumps(name) + b":" + _dumps(payload))
+            sep = b","
+        f.write(b"}}")
+        return
+    f.write(b'{\n  "source": ' + _dumps(str(path), True) + b',\n  "sheets": {')
+    sep = b"\n    "
+    for name, payload in sheets:
+        f.write(sep + _dumps(name, True) + b": ")
+        f.write(_dumps(payload, True).replace(b"\n", b"\n    "))
+        sep = b",\n    "
+    f.write(b"}\n}" if sep == b"\n    " else b"\n  }\n}")
+
+
+def _cache_key(path: Path, preserve_formulas: bool, pretty: bool) -> str:
+    """SHA-256 over the workbook bytes, the source path (embedded in the output),
+    the reader (openpyxl with its version, or calamine), the layout and the output
+    format version."""
+    reader = f"openpyxl-{openpyxl.__version__}" if preserve_formulas else "calamine"
+    layout = "pretty" if pretty else "compact"
+    # Stream the file through the hash rather than reading it into memory
+    with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+
+            h = hashlib.file_digest(f, "sha256")
+        else:
+            h = hashlib.sha256()
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                h.update(chunk)
+    h.update(f"\0{path}\0{reader}\0{layout}\0{_CACHE_VERSION}".encode())
+    return h.hexdigest()
+
+
+def _process_one(
+    excel_path: Path,
+    out_path: Path,
+    use_cache: bool,
+    jobs: Optional[int],
+    preserve_formulas: bool = True,
+    pretty: bool = False,
+) -> str:
+    """Parse one workbook into `out_path` (or copy its cached output); returns the status line."""
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    cached = CACHE_DIR / f"{_cache_key(excel_path, preserve_formulas, pretty)}.json" if use_cache else None
+    if cached is not None and cached.is_file():
+        shutil.copyfile(cached, out_path)
+        return f"Wrote {out_path} (cached)"
+
+    write_workbook(excel_path, out_path, jobs, preserve_formulas, pretty)
+    if cached is not None:
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        partial = cached.with_suffix(f".{os.getpid()}.tmp")
+        shutil.copyfile(out_path, partial)
+        os.replace(partial, cached)  # never leave a truncated entry behind
+    return f"Wrote {out_path}"
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Parse vancomycin Excel into JSON")
-    parser.add_argument("excel_path", type=str, help="Path to XLSX file")
+    parser.add_argument("excel_paths", type=str, nargs="+", help="Path(s) to XLSX files")
     parser.add_argument(
         "--out",
         type=str,
-        default="data/parsed/basic_workbook.json",
-        help="Output JSON path",
+        default=None,
+        help="Output JSON path for a single workbook (default: data/parsed/basic_workbook.json)",
+    )
+    parser.add_argument(
+        "--out-dir",
+        type=str,
+        default="data/parsed",
+        help="Output directory when several workbooks are given; each is written as <stem>.json",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes: workbooks in parallel, or a single workbook's sheets (default: CPU count)",
+    )
+    parser.add_argument(
+        "--preserve-formulas",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Keep formula cells as \"=...\" text via openpyxl (needed by the Excel engine); "
+        "--no-preserve-formulas reads cached values only with python-calamine, much faster",
+    )
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="Indent the JSON output for reading (default: compact)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Always re-parse instead of reusing output cached under {CACHE_DIR}",
     )
     args = parser.parse_args()
-    out_path = Path(args.out)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if not args.preserve_formulas and CalamineWorkbook is None:
+        parser.error("--no-preserve-formulas requires python-calamine (pip install python-calamine)")
+    excel_paths = [Path(p) for p in args.excel_paths]
+    jobs = max(1, args.jobs)
+
+    if len(excel_paths) == 1:
+        out_paths = [Path(args.out or "data/parsed/basic_workbook.json")]
+    elif args.out:
+        parser.error("--out takes a single workbook; use --out-dir for several")
+    else:
+        out_paths = [Path(args.out_dir) / f"{p.stem}.json" for p in excel_paths]
+        if len(set(out_paths)) != len(out_paths):
+            parser.error("workbooks with the same file name would overwrite each other in --out-dir")
 
-    data = dump_workbook(Path(args.excel_path))
-    out_path.write_text(json.dumps(data, indent=2))
-    print(f"Wrote {out_path}")
+    # Fan out over workbooks when there are several; a lone workbook spends the
+    # jobs on its sheets instead, so the two pools never nest.
+    if len(excel_paths) == 1 or jobs == 1:
+        for excel_path, out_path in zip(excel_paths, out_paths):
+            print(
+                _process_one(
+                    excel_path, out_path, not args.no_cache, jobs, args.preserve_formulas, args.pretty
+                )
+            )
+        return
+    with ProcessPoolExecutor(max_workers=min(jobs, len(excel_paths))) as executor:
+        for line in executor.map(
+            _process_one,
+            excel_paths,
+            out_paths,
+            repeat(not args.no_cache),
+            repeat(1),
+            repeat(args.preserve_formulas),
+            repeat(args.pretty),
+        ):
+            print(line)
 
 
 if __name__ == "__main__":
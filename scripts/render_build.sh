@@ -16,6 +16,15 @@ mkdir -p backend/static
 rm -rf backend/static/*
 cp -R dist/* backend/static/
 
+# Precompressed sidecars for the hashed JS/CSS bundles; the static mounts serve
+# them when the client sends a matching Accept-Encoding.
+if [ -d backend/static/assets ]; then
+  find backend/static/assets -type f \( -name '*.js' -o -name '*.css' -o -name '*.svg' \) -exec gzip -9 -k -f {} +
+  if command -v brotli >/dev/null 2>&1; then
+    find backend/static/assets -type f \( -name '*.js' -o -name '*.css' -o -name '*.svg' \) -exec brotli -q 11 -k -f {} +
+  fi
+fi
+
 BUILD_TIME="$(date -u +"%Y-%m-%dT%H:%M:%SZ")"
 GIT_SHA="${RENDER_GIT_COMMIT:-}"
 if [ -z "$GIT_SHA" ]; then